@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites', 
+    'django.contrib.postgres',
 
     # Third-Party Apps
     'rest_framework',
@@ -184,6 +185,21 @@ WSGI_APPLICATION = 'core.wsgi.application'
 DATABASES = {
     'default': env.db(),
 }
+# PgBouncer em transaction pooling (host "-pooler" do Neon) não mantém cursores no
+# servidor entre transações: o .iterator() fora de atomic() passa a ler o resultado de uma vez.
+# As respostas em streaming leem em lotes por chave (events/streaming.py).
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = env.bool(
+    'DATABASE_DISABLE_SERVER_SIDE_CURSORS',
+    default='-pooler' in DATABASES['default'].get('HOST', ''),
+)
+
+
+# Cache (LocMem por padrão; em produção use CACHE_URL=redis://... ou memcached)
+# Com vários workers o cache precisa ser compartilhado: o autocomplete (user/autocomplete.py)
+# sincroniza os índices em memória por ele
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
 
 
 # Password validation
@@ -210,4 +226,7 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Processos usados para gerar os derivados das capas de trilhas (0 = síncrono)
+TRILHA_COVER_WORKERS = env.int('TRILHA_COVER_WORKERS', default=2)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ParticipantCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) para participantes de um evento.
+    Ordena por (registered_at, id) para que cada página custe o mesmo,
+    independente da posição, mesmo em eventos com milhares de inscritos.
+    """
+    ordering = ('registered_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class EventSearchPagination(PageNumberPagination):
+    """Paginação dos resultados da busca textual (`?q=`) de eventos."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -13,4 +13,20 @@ class IsAdminUserOrReadOnly(permissions.BasePermission):
             return True
             
         # Para ações de escrita, verificar se o usuário é staff ()
-        return request.user and request.user.is_staff
\ No newline at end of file
+        return request.user and request.user.is_staff
+
+class IsStaffOrEventOrganizer(permissions.BasePermission):
+    """
+    Permite acesso ao evento apenas para:
+    - usuários staff/admin
+    - o criador do evento
+    - participantes com papel de organizador
+    """
+
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        if user.is_staff or obj.creator_id == user.id:
+            return True
+        return obj.participants.filter(user=user, role='organizer').exists()
@@ -1,7 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .viewsets import EventViewSet
+from events import views
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet, basename='event')
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # Feeds iCalendar para apps de calendário (assinatura em vez de polling da API JSON)
+    path('calendar.ics', views.public_calendar_feed, name='events-calendar-public'),
+    path('calendar/<str:token>.ics', views.user_calendar_feed, name='events-calendar-user'),
+]
@@ -1,10 +1,34 @@
 from rest_framework import serializers
+from events.images import store_base64_image
 from events.models import Event, EventParticipant
-from user.api.v1.serializers import UserSerializer
+from user.api.v1.serializers import UserSummarySerializer
+
+
+class Base64ImageField(serializers.Field):
+    """
+    Recebe a imagem em base64 (data URI ou conteúdo puro) e devolve a URL curta.
+    A decodificação acontece uma única vez, na escrita; o modelo guarda só o caminho.
+    """
+
+    def to_internal_value(self, data):
+        if data in (None, ''):
+            return None
+        if not isinstance(data, str):
+            raise serializers.ValidationError('Envie a imagem como string base64.')
+        try:
+            return store_base64_image(data)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(value.url) if request else value.url
 
 
 class EventParticipantSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = UserSummarySerializer(read_only=True)
     user_id = serializers.PrimaryKeyRelatedField(
         queryset=EventParticipant._meta.get_field('user').remote_field.model.objects.all(),
         source='user',
@@ -13,17 +37,20 @@ class EventParticipantSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = EventParticipant
-        fields = ['id', 'user', 'user_id', 'role', 'registered_at']
+        fields = ['id', 'user', 'user_id', 'role', 'status', 'registered_at']
+        read_only_fields = ['status']
 
 
 class EventSerializer(serializers.ModelSerializer):
-    creator = UserSerializer(read_only=True)
+    creator = UserSummarySerializer(read_only=True)
     creator_id = serializers.PrimaryKeyRelatedField(
         queryset=Event._meta.get_field('creator').remote_field.model.objects.all(),
         source='creator',
         write_only=True
     )
     participants = EventParticipantSerializer(many=True, read_only=True)
+    thumbnail = Base64ImageField(required=False, allow_null=True)
+    banner = Base64ImageField(required=False, allow_null=True)
 
     class Meta:
         model = Event
@@ -42,6 +69,42 @@ class EventSerializer(serializers.ModelSerializer):
             'created_at',
             'updated_at',
             'max_participants',
+            'seats_taken',
             'is_public',
             'participants'
         ]
+
+
+class EventListSerializer(serializers.ModelSerializer):
+    """
+    Representação enxuta para a listagem: sem a lista de participantes.
+    `participant_count` vem do contador desnormalizado `seats_taken` e
+    `is_registered` de uma anotação do queryset (ver EventViewSet.get_queryset),
+    então a página custa um número fixo de queries.
+    """
+    creator = UserSummarySerializer(read_only=True)
+    thumbnail = Base64ImageField(read_only=True)
+    banner = Base64ImageField(read_only=True)
+    participant_count = serializers.IntegerField(source='seats_taken', read_only=True)
+    is_registered = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Event
+        fields = [
+            'id',
+            'title',
+            'description',
+            'organization',
+            'start_datetime',
+            'end_datetime',
+            'location',
+            'thumbnail',
+            'banner',
+            'creator',
+            'created_at',
+            'updated_at',
+            'max_participants',
+            'is_public',
+            'participant_count',
+            'is_registered',
+        ]
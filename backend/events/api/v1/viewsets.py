@@ -1,10 +1,25 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Exists, OuterRef, Prefetch, Value
+from django.http import StreamingHttpResponse
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.urls import reverse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, BasePermission
 
+from events import registration
+from events.search import search_events
+from events.streaming import iter_keyset
+from events.views import make_calendar_token
 from events.models import Event, EventParticipant
-from events.api.v1.serializers import EventSerializer, EventParticipantSerializer
+from events.api.v1.pagination import EventSearchPagination, ParticipantCursorPagination
+from events.api.v1.permissions import IsStaffOrEventOrganizer
+from events.api.v1.serializers import EventSerializer, EventListSerializer, EventParticipantSerializer
 
 
 # Permissão personalizada
@@ -21,6 +36,23 @@ class IsAdminOrReadOnly(BasePermission):
         return bool(request.user and request.user.is_staff)
 
 
+class _Echo:
+    """Pseudo-buffer para o csv.writer: devolve a linha em vez de gravá-la."""
+
+    def write(self, value):
+        return value
+
+
+# Células que o Excel/LibreOffice interpretariam como fórmula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """Texto vindo do usuário no CSV: prefixa com ' o que seria executado como fórmula."""
+    value = value or ''
+    return f"'{value}" if value.startswith(CSV_FORMULA_PREFIXES) else value
+
+
 class EventViewSet(viewsets.ModelViewSet):
     """
     ViewSet principal para gerenciar eventos.
@@ -32,63 +64,224 @@ class EventViewSet(viewsets.ModelViewSet):
     serializer_class = EventSerializer
     permission_classes = [IsAdminOrReadOnly]
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return EventListSerializer
+        return EventSerializer
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lista de eventos. Com `?q=`, faz busca textual ordenada por relevância
+        e paginada (`?page=`).
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        queryset = search_events(self.filter_queryset(self.get_queryset()), query)
+        paginator = EventSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def perform_create(self, serializer):
         """
         Ao criar um evento, define o criador como o usuário autenticado (admin).
         """
         serializer.save(creator=self.request.user)
 
+    def perform_update(self, serializer):
+        """
+        Se o limite de participantes aumentar, promove a lista de espera.
+        """
+        event = serializer.save()
+        registration.fill_open_seats(event)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def register(self, request, pk=None):
         """
         Inscreve o usuário autenticado no evento.
+        Com o evento lotado, a inscrição entra na lista de espera (status `waitlisted`).
         """
         event = self.get_object()
-        user = request.user
+        try:
+            participant = registration.register(event, request.user)
+        except registration.RegistrationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Impede duplicação
-        if EventParticipant.objects.filter(event=event, user=user).exists():
-            return Response(
-                {"detail": "Usuário já inscrito neste evento."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return Response(EventParticipantSerializer(participant).data, status=status.HTTP_201_CREATED)
 
-        # Verifica limite
-        if event.max_participants and event.participants.count() >= event.max_participants:
-            return Response(
-                {"detail": "Número máximo de participantes atingido."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    @action(detail=True, methods=['get'])
+    def participants(self, request, pk=None):
+        """
+        Lista paginada (cursor) dos participantes do evento.
+        GET /api/v1/events/events/<id>/participants/?role=speaker&cursor=...
+        """
+        event = self.get_object()
+        queryset = EventParticipant.objects.filter(event=event).select_related('user__profile')
 
-        participant = EventParticipant.objects.create(event=event, user=user)
-        return Response(EventParticipantSerializer(participant).data, status=status.HTTP_201_CREATED)
+        role = request.query_params.get('role')
+        if role:
+            valid_roles = dict(EventParticipant.ROLE_CHOICES)
+            if role not in valid_roles:
+                return Response(
+                    {"detail": f"Papel inválido. Use um de: {', '.join(valid_roles)}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(role=role)
+
+        paginator = ParticipantCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = EventParticipantSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated, IsStaffOrEventOrganizer])
+    def export_participants(self, request, pk=None):
+        """
+        Exporta os participantes do evento em CSV (staff, criador ou organizadores).
+        A resposta é gerada em streaming, em lotes paginados por chave (ver events/streaming.py),
+        então eventos com dezenas de milhares de inscritos não ocupam a memória do worker.
+        GET /api/v1/events/events/<id>/export_participants/
+        """
+        event = self.get_object()
+        rows = iter_keyset(
+            EventParticipant.objects.filter(event=event).values_list(
+                'user__email', 'user__profile__nome', 'user__profile__arroba',
+                'role', 'status', 'registered_at', 'id',
+            ),
+            'registered_at',
+            key=lambda row: (row[5], row[6]),
+            chunk_size=2000,
+        )
+        writer = csv.writer(_Echo())
+
+        def generate():
+            yield writer.writerow(['email', 'nome', 'arroba', 'role', 'status', 'registered_at'])
+            for email, nome, arroba, role, participant_status, registered_at, _ in rows:
+                yield writer.writerow([
+                    _csv_cell(email), _csv_cell(nome), _csv_cell(arroba),
+                    role, participant_status, registered_at.isoformat(),
+                ])
+
+        response = StreamingHttpResponse(generate(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="evento-{event.pk}-participantes.csv"'
+        return response
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def unregister(self, request, pk=None):
         """
         Remove o usuário autenticado da lista de participantes.
+        A vaga liberada é passada ao primeiro da lista de espera.
         """
         event = self.get_object()
-        user = request.user
+        try:
+            registration.unregister(event, request.user)
+        except registration.RegistrationError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {"detail": "Usuário removido do evento com sucesso."},
+            status=status.HTTP_204_NO_CONTENT
+        )
+
+    # Agrupamentos aceitos pelo endpoint de calendário
+    CALENDAR_TRUNCS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+    CALENDAR_MAX_DAYS = 366
 
-        participation = EventParticipant.objects.filter(event=event, user=user).first()
-        if not participation:
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Contagem de eventos por dia/semana/mês em um intervalo, com resumo de cada evento.
+        GET /api/v1/events/events/calendar/?start=2026-10-01&end=2026-10-31&group_by=day
+        (`end` é inclusivo; respeita as mesmas regras de visibilidade da listagem)
+        """
+        group_by = request.query_params.get('group_by', 'day')
+        if group_by not in self.CALENDAR_TRUNCS:
             return Response(
-                {"detail": "Usuário não está inscrito neste evento."},
+                {"detail": "group_by deve ser 'day', 'week' ou 'month'."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        participation.delete()
-        return Response(
-            {"detail": "Usuário removido do evento com sucesso."},
-            status=status.HTTP_204_NO_CONTENT
+        start = parse_date(request.query_params.get('start') or '')
+        end = parse_date(request.query_params.get('end') or '')
+        if not start or not end or end < start:
+            return Response(
+                {"detail": "Informe start e end no formato AAAA-MM-DD (start <= end)."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (end - start).days >= self.CALENDAR_MAX_DAYS:
+            return Response(
+                {"detail": f"Intervalo máximo de {self.CALENDAR_MAX_DAYS} dias."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tz = timezone.get_current_timezone()
+        range_start = timezone.make_aware(datetime.combine(start, time.min), tz)
+        range_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+        events = self.get_queryset().filter(start_datetime__gte=range_start, start_datetime__lt=range_end)
+        trunc = self.CALENDAR_TRUNCS[group_by]('start_datetime')
+
+        # Um único GROUP BY para as contagens
+        counts = (
+            events.annotate(bucket=trunc)
+            .order_by('bucket')
+            .values('bucket')
+            .annotate(count=Count('id'))
         )
+        buckets = {
+            row['bucket'].date(): {"date": row['bucket'].date(), "count": row['count'], "events": []}
+            for row in counts
+        }
+
+        # Resumos compactos (apenas as colunas necessárias para o calendário)
+        stubs = events.annotate(bucket=trunc).values(
+            'id', 'title', 'start_datetime', 'end_datetime', 'location', 'bucket'
+        )
+        for stub in stubs:
+            bucket = buckets.get(stub.pop('bucket').date())
+            if bucket is not None:
+                bucket["events"].append(stub)
+
+        return Response({
+            "start": start,
+            "end": end,
+            "group_by": group_by,
+            "buckets": list(buckets.values()),
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def calendar_link(self, request):
+        """
+        Retorna a URL do feed .ics pessoal (inscrições do usuário autenticado).
+        GET /api/v1/events/events/calendar_link/
+        """
+        path = reverse('events-calendar-user', kwargs={'token': make_calendar_token(request.user)})
+        return Response({"url": request.build_absolute_uri(path)})
 
     def get_queryset(self):
         """
         Retorna apenas eventos públicos, mas administradores veem todos.
         """
         user = self.request.user
-        if user.is_authenticated and user.is_staff:
-            return Event.objects.all()
-        return Event.objects.filter(is_public=True)
+        queryset = Event.objects.select_related('creator__profile').defer('search_vector')
+        if not (user.is_authenticated and user.is_staff):
+            queryset = queryset.filter(is_public=True)
+
+        if self.action == 'list':
+            # Inscrição calculada no próprio SELECT (sem N+1); a contagem vem de seats_taken
+            if user.is_authenticated:
+                is_registered = Exists(
+                    EventParticipant.objects.filter(event=OuterRef('pk'), user=user)
+                )
+            else:
+                is_registered = Value(False)
+            queryset = queryset.annotate(is_registered=is_registered)
+        elif self.action == 'retrieve':
+            # Lista completa de participantes apenas no detalhe
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'participants',
+                    queryset=EventParticipant.objects.select_related('user__profile'),
+                )
+            )
+        return queryset
@@ -0,0 +1,91 @@
+from datetime import timezone as dt_timezone
+
+"""Geração de feeds iCalendar (RFC 5545) para os eventos.
+
+As funções aqui são geradores: cada VEVENT é produzido sob demanda a partir
+de um iterável de eventos (lido em lotes, ver events/streaming.py), então o feed pode
+ser enviado com StreamingHttpResponse sem montar o arquivo inteiro em memória.
+"""
+
+PRODID = '-//Costanza//Eventos Universitarios//PT-BR'
+CRLF = '\r\n'
+
+
+def escape_text(value):
+    """Escapa caracteres especiais de campos TEXT."""
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    """Quebra linhas com mais de 75 octetos, como exige a RFC 5545."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + CRLF
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Não corta no meio de um caractere multibyte
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # linhas de continuação começam com um espaço
+    return (CRLF + ' ').join(parts) + CRLF
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_event(event, status='CONFIRMED'):
+    """Retorna o bloco VEVENT de um evento."""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@costanza',
+        f'DTSTAMP:{format_datetime(event.updated_at)}',
+        f'LAST-MODIFIED:{format_datetime(event.updated_at)}',
+        f'DTSTART:{format_datetime(event.start_datetime)}',
+        f'DTEND:{format_datetime(event.end_datetime)}',
+        f'SUMMARY:{escape_text(event.title)}',
+        f'DESCRIPTION:{escape_text(event.description)}',
+        f'LOCATION:{escape_text(event.location)}',
+        f'CATEGORIES:{escape_text(event.organization)}',
+        f'STATUS:{status}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold_line(line) for line in lines)
+
+
+def iter_calendar(entries, name):
+    """
+    Gera o arquivo .ics em pedaços.
+    `entries` produz pares (evento, status) — ver EVENT_FIELDS para os campos usados.
+    """
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ]
+    yield ''.join(fold_line(line) for line in header)
+    for event, status in entries:
+        yield render_event(event, status)
+    yield fold_line('END:VCALENDAR')
+
+
+# Campos carregados do banco para montar o feed (evita trazer colunas desnecessárias)
+EVENT_FIELDS = (
+    'id', 'title', 'description', 'organization', 'location',
+    'start_datetime', 'end_datetime', 'updated_at',
+)
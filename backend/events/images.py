@@ -0,0 +1,109 @@
+import base64
+import binascii
+import hashlib
+import re
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+"""Armazenamento endereçado por conteúdo das imagens de eventos.
+
+O frontend continua enviando thumbnail/banner em base64 (data URI ou conteúdo
+puro). O base64 é decodificado uma única vez na escrita e os bytes são salvos
+em MEDIA_ROOT com o SHA-256 do conteúdo como nome, de modo que a mesma imagem
+enviada duas vezes ocupa um único arquivo. O banco guarda apenas o caminho.
+"""
+
+IMAGE_DIR = 'events/images'
+# Único formato aceito de volta como caminho: o gerado por store_image_bytes
+STORED_NAME_RE = re.compile(rf'^{IMAGE_DIR}/([0-9a-f]{{2}})/\1[0-9a-f]{{62}}\.(?:png|jpg|gif|webp)$')
+
+# Tipos aceitos: MIME do data URI -> extensão do arquivo
+MIME_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+
+def _sniff_extension(data):
+    """Descobre a extensão a partir dos primeiros bytes do arquivo."""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def decode_base64_image(value):
+    """
+    Decodifica uma imagem em base64 (com ou sem prefixo data URI).
+    Retorna (bytes, extensão) ou lança ValueError se o conteúdo não for uma imagem suportada.
+    """
+    header, _, payload = value.partition(',') if value.startswith('data:') else ('', '', value)
+    try:
+        data = base64.b64decode(''.join(payload.split()), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('Conteúdo base64 inválido.')
+
+    extension = _sniff_extension(data)
+    if header:
+        mime = header[len('data:'):].split(';')[0].lower()
+        extension = extension or MIME_EXTENSIONS.get(mime)
+    if not extension:
+        raise ValueError('Formato de imagem não suportado (use PNG, JPEG, GIF ou WebP).')
+    return data, extension
+
+
+def store_image_bytes(data, extension):
+    """Salva os bytes com o SHA-256 como nome e retorna o caminho relativo ao MEDIA_ROOT."""
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{IMAGE_DIR}/{digest[:2]}/{digest}.{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def _stored_name(value):
+    """
+    Caminho no storage de um valor que não é base64 (URL da própria API ou o
+    caminho em si). Retorna None se o valor não for nem URL nem caminho.
+    """
+    if value.startswith(('http://', 'https://')):
+        value = urlparse(value).path
+    if value.startswith(settings.MEDIA_URL):
+        return value[len(settings.MEDIA_URL):]
+    if value.startswith(f'{IMAGE_DIR}/'):
+        return value
+    return None
+
+
+def store_base64_image(value):
+    """
+    Converte o valor recebido pela API em um caminho no storage.
+    - Vazio/None -> None
+    - URL ou caminho já armazenado (ida e volta do próprio GET) -> caminho atual,
+      desde que tenha o formato gerado aqui e o arquivo exista
+    - base64 -> decodifica, salva e retorna o novo caminho
+    Lança ValueError para caminhos fora desse formato e conteúdo inválido.
+    """
+    if not value:
+        return None
+    value = value.strip()
+
+    stored = _stored_name(value)
+    if stored is not None:
+        if not STORED_NAME_RE.match(stored) or not default_storage.exists(stored):
+            raise ValueError('Caminho de imagem inválido.')
+        return stored
+
+    data, extension = decode_base64_image(value)
+    return store_image_bytes(data, extension)
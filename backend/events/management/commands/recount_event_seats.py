@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from events import registration
+
+
+class Command(BaseCommand):
+    help = "Recalcula Event.seats_taken a partir das inscrições confirmadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events', help='Apenas este evento (repetível).')
+
+    def handle(self, *args, events, **options):
+        drifted = registration.recount_seats(event_ids=events)
+        for event_id, (old, new) in sorted(drifted.items()):
+            self.stdout.write(f'[{event_id}] seats_taken {old} -> {new}')
+        self.stdout.write(self.style.SUCCESS(f'{len(drifted)} evento(s) corrigido(s).'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='thumbnail_file',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='events/images/'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='banner_file',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='events/images/'),
+        ),
+    ]
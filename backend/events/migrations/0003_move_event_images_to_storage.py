@@ -0,0 +1,110 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:41
+
+import base64
+import binascii
+import hashlib
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de eventos carregados por vez durante a conversão.
+# Cada linha pode ter vários MB de base64, então lemos em lotes pequenos.
+BATCH_SIZE = 50
+
+# Cópia congelada do formato de events/images.py no momento desta migração:
+# a migração não pode depender do código do app, que continua mudando.
+IMAGE_DIR = 'events/images'
+MIME_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+
+def _sniff_extension(data):
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _store_legacy_image(value):
+    """Blob base64 legado (data URI ou conteúdo puro) -> caminho no storage. ValueError se inválido."""
+    value = value.strip()
+    header, _, payload = value.partition(',') if value.startswith('data:') else ('', '', value)
+    try:
+        data = base64.b64decode(''.join(payload.split()), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('base64 inválido')
+
+    extension = _sniff_extension(data)
+    if header:
+        extension = extension or MIME_EXTENSIONS.get(header[len('data:'):].split(';')[0].lower())
+    if not extension:
+        raise ValueError('formato de imagem não suportado')
+
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'{IMAGE_DIR}/{digest[:2]}/{digest}.{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def move_base64_to_storage(apps, schema_editor):
+    """Decodifica os blobs base64 existentes para o storage, em lotes por chave primária."""
+    Event = apps.get_model('events', 'Event')
+    last_pk = 0
+    discarded = 0
+    while True:
+        batch = list(
+            Event.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'thumbnail', 'banner')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for pk, thumbnail, banner in batch:
+            updates = {}
+            for field, value in (('thumbnail_file', thumbnail), ('banner_file', banner)):
+                if not value or not value.strip():
+                    updates[field] = None
+                    continue
+                try:
+                    updates[field] = _store_legacy_image(value)
+                except ValueError as exc:
+                    # Conteúdo inválido: descarta a imagem em vez de abortar a migração,
+                    # mas registra qual (a coluna antiga é removida na 0004)
+                    logger.warning(
+                        'Evento %s: %s descartado (%s; %d caracteres, início %r).',
+                        pk, field.removesuffix('_file'), exc, len(value), value[:40],
+                    )
+                    discarded += 1
+                    updates[field] = None
+            Event.objects.filter(pk=pk).update(**updates)
+        last_pk = batch[-1][0]
+    if discarded:
+        logger.warning('%d imagem(ns) de evento inválida(s) descartada(s) na conversão para o storage.', discarded)
+
+
+class Migration(migrations.Migration):
+    # Migração de dados separada das alterações de schema: no PostgreSQL,
+    # UPDATEs seguidos de ALTER TABLE na mesma transação podem falhar.
+
+    dependencies = [
+        ('events', '0002_event_thumbnail_file_event_banner_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_base64_to_storage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_move_event_images_to_storage'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='event',
+            name='thumbnail',
+        ),
+        migrations.RemoveField(
+            model_name='event',
+            name='banner',
+        ),
+        migrations.RenameField(
+            model_name='event',
+            old_name='thumbnail_file',
+            new_name='thumbnail',
+        ),
+        migrations.RenameField(
+            model_name='event',
+            old_name='banner_file',
+            new_name='banner',
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='thumbnail',
+            field=models.ImageField(blank=True, help_text='Imagem para listagem (enviada em base64 pela API)', max_length=255, null=True, upload_to='events/images/'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='banner',
+            field=models.ImageField(blank=True, help_text='Imagem para cabeçalho (enviada em base64 pela API)', max_length=255, null=True, upload_to='events/images/'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_remove_event_thumbnail_remove_event_banner_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventparticipant',
+            name='status',
+            field=models.CharField(choices=[('confirmed', 'Confirmado'), ('waitlisted', 'Lista de espera')], default='confirmed', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='eventparticipant',
+            index=models.Index(fields=['event', 'status', 'registered_at', 'id'], name='events_part_waitlist_idx'),
+        ),
+    ]
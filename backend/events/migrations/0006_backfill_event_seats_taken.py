@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:06
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_seats_taken(apps, schema_editor):
+    """Inscrições existentes são todas confirmadas: o contador é o total por evento."""
+    Event = apps.get_model('events', 'Event')
+    EventParticipant = apps.get_model('events', 'EventParticipant')
+    confirmed = (
+        EventParticipant.objects.filter(event=OuterRef('pk'), status='confirmed')
+        .order_by()
+        .values('event')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Event.objects.update(seats_taken=Coalesce(Subquery(confirmed, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_seats_taken_eventparticipant_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_seats_taken, migrations.RunPython.noop),
+    ]
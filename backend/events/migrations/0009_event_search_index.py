@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:01
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_CONFIG = 'portuguese'
+
+
+def create_search_index(apps, schema_editor):
+    """Cria o índice de busca conforme o banco e preenche os eventos existentes."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS events_event_search_gin '
+            'ON events_event USING gin (search_vector)'
+        )
+        Event = apps.get_model('events', 'Event')
+        Event.objects.update(
+            search_vector=(
+                SearchVector('title', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('organization', weight='B', config=SEARCH_CONFIG)
+                + SearchVector('location', weight='B', config=SEARCH_CONFIG)
+                + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+            )
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS events_event_fts USING fts5('
+            "title, description, organization, location, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO events_event_fts (rowid, title, description, organization, location) '
+            'SELECT id, title, description, organization, location FROM events_event'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS events_event_search_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS events_event_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_event_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventparticipant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
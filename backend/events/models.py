@@ -1,11 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 
-"""Armazenamento de imagens em base64.
-Para simplificar
-e seguir a solicitação, os thumbnails e banners agora serão armazenados como
-strings (base64). Isso evita a dependência de sistema de arquivos para uploads
-e facilita consumo direto pela API frontend.
+"""Armazenamento de imagens.
+A API continua recebendo thumbnails e banners em base64, mas eles são
+decodificados uma única vez na escrita (ver events/images.py) e salvos em
+MEDIA_ROOT com o SHA-256 do conteúdo como nome. A linha do evento guarda
+apenas o caminho do arquivo e a API devolve a URL curta.
 """
 
 class Event(models.Model):
@@ -15,18 +16,22 @@ class Event(models.Model):
     start_datetime = models.DateTimeField()  
     end_datetime = models.DateTimeField()    
     location = models.CharField(max_length=200)
-    # thumbnail será a imagem codificada em base64 (PNG ou JPEG)
-    thumbnail = models.TextField(
+    # thumbnail: caminho da imagem no storage (nome = SHA-256 do conteúdo)
+    thumbnail = models.ImageField(
+        upload_to='events/images/',
+        max_length=255,
         null=True,
         blank=True,
-        help_text="Imagem em base64 (data URI ou conteúdo base64) para listagem"
+        help_text="Imagem para listagem (enviada em base64 pela API)"
     )
 
-    # banner será a imagem codificada em base64 (PNG ou JPEG)
-    banner = models.TextField(
+    # banner: caminho da imagem no storage (nome = SHA-256 do conteúdo)
+    banner = models.ImageField(
+        upload_to='events/images/',
+        max_length=255,
         null=True,
         blank=True,
-        help_text="Imagem em base64 (data URI ou conteúdo base64) para cabeçalho"
+        help_text="Imagem para cabeçalho (enviada em base64 pela API)"
     )
 
     # cretator é o usuário que criou o evento
@@ -39,7 +44,13 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     max_participants = models.PositiveIntegerField(null=True, blank=True)
+    # Contador desnormalizado de vagas ocupadas (participantes confirmados).
+    # Atualizado atomicamente por events/registration.py, nunca via COUNT.
+    seats_taken = models.PositiveIntegerField(default=0, editable=False)
     is_public = models.BooleanField(default=True)
+    # Vetor de busca (PostgreSQL) sobre título, descrição, organização e local.
+    # Mantido por events/signals.py; no SQLite a busca usa a tabela FTS5.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -47,6 +58,10 @@ class Event(models.Model):
     # Ordenar eventos pela data de início
     class Meta:
         ordering = ['start_datetime']
+        indexes = [
+            # Listagens e calendário filtram por visibilidade e intervalo de datas
+            models.Index(fields=['is_public', 'start_datetime'], name='events_public_start_idx'),
+        ]
 
 
 class EventParticipant(models.Model):
@@ -66,12 +81,23 @@ class EventParticipant(models.Model):
         related_name='event_participations',
         on_delete=models.CASCADE
     )
+    class Status(models.TextChoices):
+        CONFIRMED = 'confirmed', 'Confirmado'
+        WAITLISTED = 'waitlisted', 'Lista de espera'
+
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='attendee')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.CONFIRMED)
     registered_at = models.DateTimeField(auto_now_add=True)
+    # Muda com o status (promoção da lista de espera): entra no ETag do feed pessoal
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('event', 'user')
         ordering = ['registered_at']
+        indexes = [
+            # Fila FIFO da lista de espera: próximo a ser promovido por evento
+            models.Index(fields=['event', 'status', 'registered_at', 'id'], name='events_part_waitlist_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.event.title} ({self.role})"
\ No newline at end of file
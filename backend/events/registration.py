@@ -0,0 +1,154 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+
+from events.models import Event, EventParticipant
+
+"""Motor de inscrição em eventos.
+
+A vaga é reservada com um único UPDATE condicional sobre `Event.seats_taken`
+(sem COUNT), com a linha do evento travada: inscrições, cancelamentos e
+promoções do mesmo evento são serializados. Quando o evento está
+lotado a inscrição entra na lista de espera, que é promovida em ordem de
+chegada (FIFO) sempre que uma vaga é liberada.
+"""
+
+
+class RegistrationError(Exception):
+    """Erro de regra de negócio na inscrição; a mensagem vai direto para a API."""
+
+
+class AlreadyRegistered(RegistrationError):
+    pass
+
+
+class NotRegistered(RegistrationError):
+    pass
+
+
+def _lock_event(event_id):
+    """
+    Trava a linha do evento até o fim da transação. O SQLite não tem FOR UPDATE
+    e já serializa as escritas; lá a leitura extra só provocaria SQLITE_BUSY
+    ao promover o lock de leitura para escrita.
+    """
+    if connection.features.has_select_for_update:
+        Event.objects.select_for_update().filter(pk=event_id).exists()
+
+
+def _claim_seat(event_id):
+    """Tenta ocupar uma vaga. Retorna True se havia vaga (1 linha atualizada)."""
+    return bool(
+        Event.objects.filter(pk=event_id)
+        .filter(Q(max_participants__isnull=True) | Q(seats_taken__lt=F('max_participants')))
+        .update(seats_taken=F('seats_taken') + 1)
+    )
+
+
+def _next_waitlisted(event_id):
+    return (
+        EventParticipant.objects.filter(event_id=event_id, status=EventParticipant.Status.WAITLISTED)
+        .order_by('registered_at', 'id')
+        .first()
+    )
+
+
+def register(event, user, role='attendee'):
+    """
+    Inscreve o usuário no evento. Retorna o EventParticipant criado,
+    com status `confirmed` ou `waitlisted`.
+    """
+    try:
+        with transaction.atomic():
+            # Trava o evento antes de decidir o status: com o evento lotado o UPDATE de
+            # _claim_seat não afeta nenhuma linha (e não trava nada), e um cancelamento
+            # concorrente poderia liberar a vaga sem ver esta inscrição na fila
+            _lock_event(event.pk)
+            status = (
+                EventParticipant.Status.CONFIRMED if _claim_seat(event.pk)
+                else EventParticipant.Status.WAITLISTED
+            )
+            # A unique_together (event, user) barra inscrições duplicadas;
+            # o IntegrityError desfaz também a vaga reservada acima.
+            return EventParticipant.objects.create(event=event, user=user, role=role, status=status)
+    except IntegrityError:
+        raise AlreadyRegistered("Usuário já inscrito neste evento.")
+
+
+def unregister(event, user):
+    """
+    Remove a inscrição do usuário. Se ele ocupava uma vaga, ela passa para o
+    primeiro da lista de espera; sem fila, o contador é decrementado.
+    Retorna o participante promovido (ou None).
+    """
+    with transaction.atomic():
+        # Trava a linha do evento: serializa cancelamentos/promoções do mesmo evento
+        _lock_event(event.pk)
+
+        participation = EventParticipant.objects.filter(event=event, user=user).first()
+        if not participation:
+            raise NotRegistered("Usuário não está inscrito neste evento.")
+        # O post_delete (events/signals.py) libera a vaga só em exclusões fora daqui
+        participation._seat_released = True
+        participation.delete()
+
+        if participation.status != EventParticipant.Status.CONFIRMED:
+            return None
+        return release_seat(event.pk)
+
+
+def release_seat(event_id):
+    """
+    Libera a vaga de um confirmado removido: ela passa para o primeiro da lista
+    de espera (o contador não muda) ou o contador é decrementado.
+    Retorna o participante promovido (ou None).
+    """
+    with transaction.atomic():
+        _lock_event(event_id)
+        promoted = _next_waitlisted(event_id)
+        if promoted:
+            promoted.status = EventParticipant.Status.CONFIRMED
+            promoted.save(update_fields=['status', 'updated_at'])
+            return promoted
+
+        Event.objects.filter(pk=event_id, seats_taken__gt=0).update(seats_taken=F('seats_taken') - 1)
+        return None
+
+
+def recount_seats(event_ids=None):
+    """
+    Recalcula `seats_taken` a partir das inscrições confirmadas (reconciliação
+    de contadores alterados por caminhos que não passam por este módulo).
+    Retorna {id do evento: (valor antigo, valor novo)} dos eventos corrigidos.
+    """
+    events = Event.objects.all() if event_ids is None else Event.objects.filter(pk__in=event_ids)
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            # FOR UPDATE não combina com agregação: trava as linhas antes de contar
+            list(events.select_for_update().values_list('pk', flat=True))
+        rows = events.annotate(
+            confirmed=Count('participants', filter=Q(participants__status=EventParticipant.Status.CONFIRMED)),
+        ).values_list('id', 'seats_taken', 'confirmed')
+        drifted = {pk: (seats, confirmed) for pk, seats, confirmed in rows if seats != confirmed}
+        Event.objects.bulk_update(
+            [Event(pk=pk, seats_taken=confirmed) for pk, (_, confirmed) in drifted.items()],
+            ['seats_taken'],
+        )
+    return drifted
+
+
+def fill_open_seats(event):
+    """
+    Promove a lista de espera enquanto houver vagas (ex.: após aumentar
+    `max_participants`). Retorna a lista de participantes promovidos.
+    """
+    promoted = []
+    with transaction.atomic():
+        _lock_event(event.pk)
+        while True:
+            candidate = _next_waitlisted(event.pk)
+            if not candidate or not _claim_seat(event.pk):
+                break
+            candidate.status = EventParticipant.Status.CONFIRMED
+            candidate.save(update_fields=['status', 'updated_at'])
+            promoted.append(candidate)
+    return promoted
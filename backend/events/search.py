@@ -0,0 +1,97 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from events.models import Event
+
+"""Busca textual de eventos.
+
+- PostgreSQL: coluna `search_vector` (tsvector) com índice GIN, mantida pelos
+  signals de events/signals.py e ordenada com SearchRank.
+- SQLite (desenvolvimento/testes): tabela virtual FTS5 `events_event_fts`
+  com o mesmo conteúdo, ordenada por bm25().
+- Outros bancos: icontains simples, sem ranking.
+"""
+
+SEARCH_CONFIG = 'portuguese'
+FTS_TABLE = 'events_event_fts'
+# Quantidade máxima de resultados (já visíveis) trazidos do FTS5
+FTS_MAX_RESULTS = 1000
+
+SEARCH_FIELDS = ('title', 'description', 'organization', 'location')
+
+
+def _search_vector():
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('organization', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('location', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_index(event_ids):
+    """Recalcula o índice de busca dos eventos informados."""
+    if connection.vendor == 'postgresql':
+        Event.objects.filter(pk__in=event_ids).update(search_vector=_search_vector())
+    elif connection.vendor == 'sqlite':
+        rows = Event.objects.filter(pk__in=event_ids).values_list('pk', *SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}) VALUES (?, ?, ?, ?, ?)',
+                list(rows),
+            )
+
+
+def remove_from_search_index(event_id):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [event_id])
+
+
+def _fts5_query(text):
+    # Cada termo vira um prefixo entre aspas: evita erros de sintaxe do MATCH
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_events(queryset, text):
+    """
+    Filtra o queryset pelo texto e anota `rank` (maior = mais relevante),
+    já ordenado por relevância.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', 'start_datetime', 'id')
+        )
+
+    if connection.vendor == 'sqlite':
+        fts_query = _fts5_query(text)
+        if not fts_query:
+            return queryset.none()
+        # O filtro de visibilidade do queryset entra na própria consulta FTS:
+        # o limite vale para eventos visíveis, não para todos os que casam
+        visible_sql, visible_params = queryset.order_by().values('pk').query.sql_with_params()
+        with connection.cursor() as cursor:
+            # bm25() retorna valores menores para resultados mais relevantes
+            cursor.execute(
+                f'SELECT rowid, bm25({FTS_TABLE}, 10.0, 1.0, 4.0, 4.0) AS score FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid IN ({visible_sql}) ORDER BY score LIMIT %s',
+                [fts_query, *visible_params, FTS_MAX_RESULTS],
+            )
+            scores = {pk: -score for pk, score in cursor.fetchall()}
+        if not scores:
+            return queryset.none()
+        rank = Case(
+            *(When(pk=pk, then=Value(score)) for pk, score in scores.items()),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=scores).annotate(rank=rank).order_by('-rank', 'start_datetime', 'id')
+
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': text})
+    return queryset.filter(condition).annotate(rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,34 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from events import registration
+from events.models import Event, EventParticipant
+from events.search import SEARCH_FIELDS, remove_from_search_index, update_search_index
+
+
+@receiver(post_save, sender=Event)
+def update_event_search_index(sender, instance, update_fields=None, **kwargs):
+    """Mantém o índice de busca em dia sempre que um campo pesquisável muda."""
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    update_search_index([instance.pk])
+
+
+@receiver(post_delete, sender=Event)
+def delete_event_search_index(sender, instance, **kwargs):
+    remove_from_search_index(instance.pk)
+
+
+@receiver(post_delete, sender=EventParticipant)
+def release_seat_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Exclusões fora de registration.unregister (admin, exclusão em lote, usuário
+    removido em cascata) também liberam a vaga, mantendo `seats_taken` em dia.
+    """
+    if getattr(instance, '_seat_released', False) or instance.status != EventParticipant.Status.CONFIRMED:
+        return
+    # O próprio evento está sendo excluído: não há vaga a liberar
+    if isinstance(origin, Event) or (isinstance(origin, QuerySet) and origin.model is Event):
+        return
+    registration.release_seat(instance.event_id)
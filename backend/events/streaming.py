@@ -0,0 +1,32 @@
+from django.db.models import Q
+
+"""Leitura em lotes para respostas em streaming (CSV, feeds .ics).
+
+O gerador de uma StreamingHttpResponse roda depois que a view retornou, fora
+de qualquer transação. Um `.iterator()` ali usaria um cursor no servidor
+`WITH HOLD`, que não sobrevive ao PgBouncer em modo transaction pooling (o
+host `-pooler` do Neon): o próximo lote pode ir para outra conexão. Por isso
+as respostas em streaming paginam por chave (`(campo, id) > último visto`),
+uma query curta e independente por lote, com memória constante.
+"""
+
+CHUNK_SIZE = 500
+
+
+def iter_keyset(queryset, field, key, chunk_size=CHUNK_SIZE):
+    """
+    Percorre `queryset` na ordem (`field`, id) em lotes de `chunk_size`.
+    `key(row)` retorna (valor de `field`, id) da linha, seja instância ou tupla.
+    """
+    queryset = queryset.order_by(field, 'id')
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            value, pk = last
+            page = page.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+        rows = list(page[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = key(rows[-1])
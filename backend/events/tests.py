@@ -1,3 +1,359 @@
-from django.test import TestCase
+import base64
+import importlib
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from events import registration, search
+from events.images import store_base64_image
+from events.models import Event, EventParticipant
+from events.streaming import iter_keyset
+from events.views import make_calendar_token
+from user.models import CustomUser
+
+
+def create_event(creator, **kwargs):
+    start = timezone.now() + timedelta(days=7)
+    defaults = {
+        'title': 'Semana de Tecnologia',
+        'description': 'Palestras e oficinas',
+        'organization': 'DA Computação',
+        'start_datetime': start,
+        'end_datetime': start + timedelta(hours=4),
+        'location': 'Auditório',
+        'creator': creator,
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+class RegistrationEngineTests(TestCase):
+    def setUp(self):
+        self.users = [
+            CustomUser.objects.create_user(email=f'aluno{i}@costanza.dev')
+            for i in range(4)
+        ]
+        self.event = create_event(self.users[0], max_participants=2)
+
+    def test_waitlists_when_full(self):
+        statuses = [registration.register(self.event, user).status for user in self.users[:3]]
+
+        self.assertEqual(statuses, ['confirmed', 'confirmed', 'waitlisted'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 2)
+
+    def test_duplicate_registration_does_not_take_a_seat(self):
+        registration.register(self.event, self.users[0])
+
+        with self.assertRaises(registration.AlreadyRegistered):
+            registration.register(self.event, self.users[0])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 1)
+
+    def test_unregister_promotes_first_waitlisted(self):
+        for user in self.users:
+            registration.register(self.event, user)
+
+        promoted = registration.unregister(self.event, self.users[0])
+
+        self.assertEqual(promoted.user, self.users[2])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 2)
+        self.assertEqual(
+            EventParticipant.objects.get(event=self.event, user=self.users[3]).status,
+            EventParticipant.Status.WAITLISTED,
+        )
+
+    def test_unregister_without_waitlist_frees_seat(self):
+        registration.register(self.event, self.users[0])
+
+        registration.unregister(self.event, self.users[0])
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 0)
+        with self.assertRaises(registration.NotRegistered):
+            registration.unregister(self.event, self.users[0])
+
+    def test_deletes_outside_unregister_release_the_seat(self):
+        for user in self.users[:3]:
+            registration.register(self.event, user)
+
+        # Exclusão pelo admin/em lote: a vaga passa para a lista de espera
+        EventParticipant.objects.filter(user=self.users[0]).delete()
+        self.assertEqual(
+            EventParticipant.objects.get(event=self.event, user=self.users[2]).status,
+            EventParticipant.Status.CONFIRMED,
+        )
+        # Usuário removido em cascata, sem fila: o contador diminui
+        self.users[1].delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 1)
+
+    def test_recount_seats_fixes_drift(self):
+        registration.register(self.event, self.users[0])
+        Event.objects.filter(pk=self.event.pk).update(seats_taken=2)
+
+        self.assertEqual(registration.recount_seats(), {self.event.pk: (2, 1)})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 1)
+        self.assertEqual(registration.recount_seats(), {})
+
+    def test_fill_open_seats_after_raising_limit(self):
+        for user in self.users:
+            registration.register(self.event, user)
+        Event.objects.filter(pk=self.event.pk).update(max_participants=3)
+
+        promoted = registration.fill_open_seats(self.event)
+
+        self.assertEqual([p.user for p in promoted], [self.users[2]])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.seats_taken, 3)
+
+
+class EventListTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='aluno@costanza.dev')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/events/events/')
+        return response, len(queries)
+
+    def test_counts_and_registration_are_annotated(self):
+        event = create_event(self.user)
+        registration.register(event, self.user)
+        _, queries = self._list_queries()
+        for _ in range(5):
+            create_event(self.user)
+
+        response, more_queries = self._list_queries()
+
+        self.assertEqual(more_queries, queries)
+        row = next(e for e in response.data if e['id'] == event.id)
+        self.assertEqual((row['participant_count'], row['is_registered']), (1, True))
+        self.assertNotIn('participants', row)
+
+
+class ParticipantsPaginationTests(TestCase):
+    def test_cursor_pages_cover_everyone_in_order(self):
+        users = [CustomUser.objects.create_user(email=f'aluno{i}@costanza.dev') for i in range(5)]
+        event = create_event(users[0])
+        for user in users:
+            registration.register(event, user)
+        EventParticipant.objects.filter(user=users[4]).update(role='speaker')
+
+        client = APIClient()
+        url, seen = f'/api/v1/events/events/{event.pk}/participants/?page_size=2', []
+        while url:
+            page = client.get(url).data
+            self.assertLessEqual(len(page['results']), 2)
+            seen += [row['user']['id'] for row in page['results']]
+            url = page['next']
+
+        self.assertEqual(seen, [user.id for user in users])
+        speakers = client.get(f'/api/v1/events/events/{event.pk}/participants/', {'role': 'speaker'}).data
+        self.assertEqual([row['user']['id'] for row in speakers['results']], [users[4].id])
+
+
+class CalendarAggregationTests(TestCase):
+    def test_events_are_grouped_by_day(self):
+        creator = CustomUser.objects.create_user(email='organizador@costanza.dev')
+        day = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=3)
+        first = create_event(creator, start_datetime=day, end_datetime=day + timedelta(hours=1))
+        create_event(creator, start_datetime=day + timedelta(hours=2), end_datetime=day + timedelta(hours=3))
+        create_event(creator, start_datetime=day + timedelta(days=1), end_datetime=day + timedelta(days=1, hours=1))
+        create_event(creator, start_datetime=day, end_datetime=day + timedelta(hours=1), is_public=False)
+
+        params = {'start': day.date().isoformat(), 'end': (day + timedelta(days=1)).date().isoformat()}
+        response = APIClient().get('/api/v1/events/events/calendar/', params)
+
+        self.assertEqual([bucket['count'] for bucket in response.data['buckets']], [2, 1])
+        self.assertEqual(response.data['buckets'][0]['events'][0]['id'], first.id)
+        params['group_by'] = 'year'
+        self.assertEqual(APIClient().get('/api/v1/events/events/calendar/', params).status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class EventImageStorageTests(TestCase):
+    PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 16
+
+    def test_round_trip_of_stored_path(self):
+        name = store_base64_image(base64.b64encode(self.PNG).decode())
+
+        self.assertEqual(store_base64_image(f'http://testserver/media/{name}'), name)
+        self.assertEqual(store_base64_image(name), name)
+
+    def test_rejects_foreign_or_missing_paths(self):
+        missing = f'events/images/ab/ab{"0" * 62}.png'
+        for value in ('events/images/../../settings.py', '/media/events/images/x.png', missing):
+            with self.assertRaises(ValueError):
+                store_base64_image(value)
+
+    def test_legacy_migration_decoder_matches_the_app(self):
+        migration = importlib.import_module('events.migrations.0003_move_event_images_to_storage')
+        encoded = base64.b64encode(self.PNG).decode()
+
+        self.assertEqual(migration._store_legacy_image(f'data:image/png;base64,{encoded}'), store_base64_image(encoded))
+        for value in ('não é base64', base64.b64encode(b'texto').decode()):
+            with self.assertRaises(ValueError):
+                migration._store_legacy_image(value)
+
+
+class ParticipantExportTests(TestCase):
+    def test_formula_like_values_are_escaped(self):
+        staff = CustomUser.objects.create_user(email='staff@costanza.dev', is_staff=True)
+        attendee = CustomUser.objects.create_user(email='aluno@costanza.dev')
+        attendee.profile.nome = '=HYPERLINK("http://evil")'
+        attendee.profile.arroba = '@cmd'
+        attendee.profile.save()
+        event = create_event(staff)
+        registration.register(event, attendee)
+
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.get(f'/api/v1/events/events/{event.pk}/export_participants/')
+
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(rows[1].startswith('aluno@costanza.dev,"\'=HYPERLINK(""http://evil"")",\'@cmd,'))
+
+    def test_keyset_batches_cover_ties_without_a_held_cursor(self):
+        users = [CustomUser.objects.create_user(email=f'aluno{i}@costanza.dev') for i in range(5)]
+        event = create_event(users[0])
+        for user in users:
+            registration.register(event, user)
+        # Mesmo registered_at para todos: o desempate pelo id atravessa os lotes
+        EventParticipant.objects.filter(event=event).update(registered_at=timezone.now())
+
+        with self.assertNumQueries(3):
+            rows = list(iter_keyset(
+                EventParticipant.objects.filter(event=event).values_list('registered_at', 'id', 'user_id'),
+                'registered_at',
+                key=lambda row: (row[0], row[1]),
+                chunk_size=2,
+            ))
+
+        self.assertEqual([row[2] for row in rows], [user.id for user in users])
+
+
+class UserCalendarFeedTests(TestCase):
+    def setUp(self):
+        self.organizer = CustomUser.objects.create_user(email='organizador@costanza.dev')
+        self.waiting = CustomUser.objects.create_user(email='espera@costanza.dev')
+        self.event = create_event(self.organizer, max_participants=1)
+        registration.register(self.event, self.organizer)
+        registration.register(self.event, self.waiting)
+        self.url = f'/api/v1/events/calendar/{make_calendar_token(self.waiting)}.ics'
+
+    def test_promotion_invalidates_the_personal_feed(self):
+        client = APIClient()
+        first = client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('STATUS:TENTATIVE', b''.join(first.streaming_content).decode())
+        self.assertEqual(client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        # Promoção altera só o status: o feed precisa deixar de responder 304
+        registration.unregister(self.event, self.organizer)
+
+        second = client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('STATUS:CONFIRMED', b''.join(second.streaming_content).decode())
+
+
+class EventSearchTests(TestCase):
+    def setUp(self):
+        creator = CustomUser.objects.create_user(email='organizador@costanza.dev')
+        self.python = create_event(creator, title='Oficina de Python', description='Introdução à linguagem')
+        self.hackathon = create_event(
+            creator, title='Hackathon', description='Maratona com desafios em Python e JavaScript'
+        )
+        create_event(creator, title='Feira de Estágios', description='Empresas parceiras')
+        create_event(creator, title='Python avançado', description='Evento interno', is_public=False)
+
+    def test_search_is_ranked_and_respects_visibility(self):
+        response = APIClient().get('/api/v1/events/events/', {'q': 'python'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [event['id'] for event in response.data['results']],
+            [self.python.id, self.hackathon.id],
+        )
+
+    def test_result_cap_applies_after_visibility(self):
+        creator = CustomUser.objects.create_user(email='interno@costanza.dev')
+        for index in range(3):
+            create_event(creator, title=f'Python interno {index}', is_public=False)
+
+        with mock.patch.object(search, 'FTS_MAX_RESULTS', 2):
+            response = APIClient().get('/api/v1/events/events/', {'q': 'python'})
+
+        self.assertEqual(
+            sorted(event['id'] for event in response.data['results']),
+            sorted([self.python.id, self.hackathon.id]),
+        )
+
+    def test_search_index_follows_updates(self):
+        self.python.title = 'Oficina de Rust'
+        self.python.save()
+
+        response = APIClient().get('/api/v1/events/events/', {'q': 'rust'})
+
+        self.assertEqual([event['id'] for event in response.data['results']], [self.python.id])
+
+
+class RegistrationConcurrencyTests(TransactionTestCase):
+    """Dispara inscrições simultâneas no mesmo evento e verifica que não há overbooking."""
+
+    THREADS = 20
+    SEATS = 5
+
+    def _register_with_retry(self, event, user, results):
+        try:
+            # SQLite usado nos testes locais não espera por locks: repete até conseguir
+            for _ in range(200):
+                try:
+                    results.append(registration.register(event, user).status)
+                    return
+                except OperationalError:
+                    continue
+        finally:
+            connection.close()
+
+    def test_concurrent_registrations_never_oversell(self):
+        users = [
+            CustomUser.objects.create_user(email=f'stress{i}@costanza.dev')
+            for i in range(self.THREADS)
+        ]
+        event = create_event(users[0], max_participants=self.SEATS)
+        results = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(user):
+            barrier.wait()
+            self._register_with_retry(event, user, results)
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        event.refresh_from_db()
+        confirmed = EventParticipant.objects.filter(event=event, status=EventParticipant.Status.CONFIRMED)
+        self.assertEqual(len(results), self.THREADS)
+        self.assertEqual(results.count('confirmed'), self.SEATS)
+        self.assertEqual(confirmed.count(), self.SEATS)
+        self.assertEqual(event.seats_taken, self.SEATS)
+        self.assertEqual(
+            EventParticipant.objects.filter(event=event, status=EventParticipant.Status.WAITLISTED).count(),
+            self.THREADS - self.SEATS,
+        )
@@ -1,3 +1,114 @@
-from django.shortcuts import render
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import condition, require_safe
 
-# Create your views here.
+from events import ical
+from events.models import Event, EventParticipant
+from events.streaming import iter_keyset
+
+# Salt do token assinado usado na URL do feed pessoal (apps de calendário não enviam JWT)
+CALENDAR_TOKEN_SALT = 'events.calendar-feed'
+ICS_CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+
+def make_calendar_token(user):
+    return signing.dumps(user.pk, salt=CALENDAR_TOKEN_SALT)
+
+
+def _user_from_token(token):
+    try:
+        user_id = signing.loads(token, salt=CALENDAR_TOKEN_SALT)
+    except signing.BadSignature:
+        raise Http404('Feed não encontrado.')
+    user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        raise Http404('Feed não encontrado.')
+    return user
+
+
+def _public_state(request):
+    """
+    (última alteração, total) dos eventos públicos, calculado uma vez por request.
+    O total entra no ETag para que exclusões também invalidem o cache do cliente.
+    """
+    if not hasattr(request, '_calendar_state'):
+        state = Event.objects.filter(is_public=True).aggregate(last=Max('updated_at'), total=Count('id'))
+        request._calendar_state = (state['last'], state['total'])
+    return request._calendar_state
+
+
+def _user_state(request, token):
+    if not hasattr(request, '_calendar_state'):
+        user = _user_from_token(token)
+        state = EventParticipant.objects.filter(user=user).aggregate(
+            event_last=Max('event__updated_at'),
+            # updated_at cobre novas inscrições e mudanças de status (promoção)
+            participation_last=Max('updated_at'),
+            total=Count('id'),
+        )
+        dates = [d for d in (state['event_last'], state['participation_last']) if d]
+        request._calendar_state = (max(dates) if dates else None, state['total'])
+        request._calendar_user = user
+    return request._calendar_state
+
+
+def _etag(last, total, scope):
+    stamp = last.timestamp() if last else 0
+    return f'{scope}-{stamp}-{total}'
+
+
+@require_safe
+@condition(
+    etag_func=lambda request: _etag(*_public_state(request), 'public'),
+    last_modified_func=lambda request: _public_state(request)[0],
+)
+def public_calendar_feed(request):
+    """
+    Feed .ics com todos os eventos públicos.
+    GET /api/v1/events/calendar.ics
+    """
+    events = iter_keyset(
+        Event.objects.filter(is_public=True).only(*ical.EVENT_FIELDS),
+        'start_datetime',
+        key=lambda event: (event.start_datetime, event.pk),
+    )
+    entries = ((event, 'CONFIRMED') for event in events)
+    response = StreamingHttpResponse(
+        ical.iter_calendar(entries, 'Costanza - Eventos'),
+        content_type=ICS_CONTENT_TYPE,
+    )
+    response['Content-Disposition'] = 'inline; filename="eventos.ics"'
+    return response
+
+
+@require_safe
+@condition(
+    etag_func=lambda request, token: _etag(*_user_state(request, token), 'user'),
+    last_modified_func=lambda request, token: _user_state(request, token)[0],
+)
+def user_calendar_feed(request, token):
+    """
+    Feed .ics com as inscrições do usuário dono do token.
+    Inscrições na lista de espera aparecem como TENTATIVE.
+    GET /api/v1/events/calendar/<token>.ics
+    """
+    _user_state(request, token)
+    participations = iter_keyset(
+        EventParticipant.objects.filter(user=request._calendar_user)
+        .select_related('event')
+        .only('status', *(f'event__{field}' for field in ical.EVENT_FIELDS)),
+        'event__start_datetime',
+        key=lambda participation: (participation.event.start_datetime, participation.pk),
+    )
+    entries = (
+        (p.event, 'CONFIRMED' if p.status == EventParticipant.Status.CONFIRMED else 'TENTATIVE')
+        for p in participations
+    )
+    response = StreamingHttpResponse(
+        ical.iter_calendar(entries, 'Costanza - Minhas inscrições'),
+        content_type=ICS_CONTENT_TYPE,
+    )
+    response['Content-Disposition'] = 'inline; filename="minhas-inscricoes.ics"'
+    return response
@@ -1,18 +1,13 @@
 from rest_framework import serializers
 from friends.models import FriendRequest, Friendship
 from django.contrib.auth import get_user_model
+from user.api.v1.serializers import UserSummarySerializer
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = User
-        fields = ('id', 'username', 'email')
-
-
 class FriendRequestSerializer(serializers.ModelSerializer):
-    from_user = UserSerializer(read_only=True)
+    from_user = UserSummarySerializer(read_only=True)
     to_user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
 
     class Meta:
@@ -29,7 +24,7 @@ class FriendshipSerializer(serializers.ModelSerializer):
         fields = ('id', 'friend', 'created_at')
 
     def get_friend(self, obj):
+        # Compara pelos ids (sem carregar user1); os dois usuários vêm do select_related da viewset
         request = self.context.get('request')
-        if request.user == obj.user1:
-            return UserSerializer(obj.user2).data
-        return UserSerializer(obj.user1).data
+        friend = obj.user2 if obj.user1_id == request.user.id else obj.user1
+        return UserSummarySerializer(friend, context=self.context).data
@@ -3,10 +3,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from friends import operations
 from friends.models import FriendRequest, Friendship
 from .serializers import FriendRequestSerializer, FriendshipSerializer
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 
 User = get_user_model()
 
@@ -16,31 +16,29 @@ class FriendRequestViewSet(viewsets.GenericViewSet):
     serializer_class = FriendRequestSerializer
 
     def get_queryset(self):
-        return FriendRequest.objects.filter(to_user=self.request.user)
+        return FriendRequest.objects.filter(to_user=self.request.user).select_related('from_user__profile')
 
     def create(self, request):
         """
         Enviar uma nova solicitação de amizade.
         POST /api/friends/request/
+        Se o outro usuário já tinha enviado uma solicitação, ela é aceita automaticamente.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         to_user = serializer.validated_data['to_user']
-        from_user = request.user
 
-        if to_user == from_user:
-            return Response({"detail": "Você não pode enviar uma solicitação para si mesmo."}, status=status.HTTP_400_BAD_REQUEST)
+        # Sem exists() prévios: as restrições do banco decidem (ver friends/operations.py)
+        try:
+            result, friend_request = operations.send_request(request.user.pk, to_user.pk)
+        except operations.FriendRequestError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if Friendship.objects.filter(Q(user1=from_user, user2=to_user) | Q(user1=to_user, user2=from_user)).exists():
-            return Response({"detail": "Vocês já são amigos."}, status=status.HTTP_400_BAD_REQUEST)
+        if result == 'accepted':
+            # O outro usuário já tinha enviado uma solicitação: viram amigos na hora
+            return Response({"detail": "Solicitação de amizade aceita."}, status=status.HTTP_200_OK)
 
-        if FriendRequest.objects.filter(from_user=from_user, to_user=to_user).exists():
-            return Response({"detail": "Solicitação de amizade já enviada."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        if FriendRequest.objects.filter(from_user=to_user, to_user=from_user).exists():
-            return Response({"detail": "Você já tem uma solicitação pendente deste usuário."}, status=status.HTTP_400_BAD_REQUEST)
-
-        friend_request = FriendRequest.objects.create(from_user=from_user, to_user=to_user)
+        friend_request.from_user = request.user
         return Response(self.get_serializer(friend_request).data, status=status.HTTP_201_CREATED)
 
     def list(self, request):
@@ -58,11 +56,11 @@ class FriendRequestViewSet(viewsets.GenericViewSet):
         Aceitar uma solicitação de amizade.
         PUT /api/friends/request/<request_id>/accept/
         """
-        friend_request = get_object_or_404(FriendRequest, id=pk, to_user=request.user)
-        
-        Friendship.objects.create(user1=friend_request.from_user, user2=friend_request.to_user)
-        friend_request.delete()
-        
+        try:
+            operations.accept_request(int(pk), request.user.pk)
+        except (TypeError, ValueError, operations.RequestNotFound):
+            return Response({"detail": "Solicitação não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+
         return Response({"detail": "Solicitação de amizade aceita."}, status=status.HTTP_200_OK)
 
     def destroy(self, request, pk=None):
@@ -85,7 +83,7 @@ class FriendshipViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
-        return Friendship.objects.filter(Q(user1=user) | Q(user2=user))
+        return Friendship.objects.involving(user).select_related('user1__profile', 'user2__profile')
 
     def list(self, request):
         """
@@ -101,15 +99,13 @@ class FriendshipViewSet(viewsets.ReadOnlyModelViewSet):
         Remover uma amizade.
         DELETE /api/friends/<user_id>/
         """
-        friend_to_remove = get_object_or_404(User, id=pk)
-        user = request.user
-
-        friendship = Friendship.objects.filter(
-            (Q(user1=user, user2=friend_to_remove) | Q(user1=friend_to_remove, user2=user))
-        ).first()
-
-        if not friendship:
+        try:
+            friend_id = int(pk)
+        except (TypeError, ValueError):
             return Response({"detail": "Amizade não encontrada."}, status=status.HTTP_404_NOT_FOUND)
 
-        friendship.delete()
+        # Um único DELETE pelo índice único (user1, user2)
+        deleted, _ = Friendship.objects.between(request.user, friend_id).delete()
+        if not deleted:
+            return Response({"detail": "Amizade não encontrada."}, status=status.HTTP_404_NOT_FOUND)
         return Response(status=status.HTTP_204_NO_CONTENT)
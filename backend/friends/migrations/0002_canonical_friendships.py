@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:40
+
+from django.db import migrations
+from django.db.models import F
+
+
+def canonicalize_friendships(apps, schema_editor):
+    """
+    Deixa cada par na ordem (menor id, maior id): remove autoamizades e
+    pares invertidos duplicados (mantendo o mais antigo) e inverte os demais.
+    """
+    Friendship = apps.get_model('friends', 'Friendship')
+    Friendship.objects.filter(user1=F('user2')).delete()
+
+    seen = set()
+    to_delete, to_swap = [], []
+    rows = Friendship.objects.order_by('created_at', 'id').values_list('id', 'user1_id', 'user2_id')
+    for pk, user1, user2 in rows.iterator(chunk_size=2000):
+        pair = (min(user1, user2), max(user1, user2))
+        if pair in seen:
+            to_delete.append(pk)
+            continue
+        seen.add(pair)
+        if user1 > user2:
+            to_swap.append(Friendship(pk=pk, user1_id=user2, user2_id=user1))
+
+    Friendship.objects.filter(pk__in=to_delete).delete()
+    Friendship.objects.bulk_update(to_swap, ['user1', 'user2'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friends', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_friendships, migrations.RunPython.noop),
+    ]
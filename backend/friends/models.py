@@ -17,13 +17,51 @@ class FriendRequest(models.Model):
         return f"Request from {self.from_user.username} to {self.to_user.username}"
 
 
+def canonical_pair(user_a, user_b):
+    """Ids do par na ordem canônica (menor, maior); aceita usuários ou ids."""
+    a = getattr(user_a, 'pk', user_a)
+    b = getattr(user_b, 'pk', user_b)
+    return (a, b) if a < b else (b, a)
+
+
+class FriendshipQuerySet(models.QuerySet):
+    def between(self, user_a, user_b):
+        """Amizade entre os dois usuários: um seek no índice único (user1, user2)."""
+        user1, user2 = canonical_pair(user_a, user_b)
+        return self.filter(user1_id=user1, user2_id=user2)
+
+    def involving(self, user):
+        """Amizades do usuário (índices (user1, user2) e (user2, user1))."""
+        user_id = getattr(user, 'pk', user)
+        return self.filter(models.Q(user1_id=user_id) | models.Q(user2_id=user_id))
+
+
 class Friendship(models.Model):
+    # Cada par é guardado uma única vez, com user1 < user2 (ver canonical_pair)
     user1 = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='friendships1', on_delete=models.CASCADE)
     user2 = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='friendships2', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FriendshipQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user1', 'user2')
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(user1__lt=models.F('user2')),
+                name='friends_friendship_canonical_order',
+            ),
+        ]
+        indexes = [
+            # Segunda metade do "amigos do usuário" (a primeira usa o índice único)
+            models.Index(fields=['user2', 'user1'], name='friends_friendship_user2_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Normaliza a ordem para respeitar a restrição user1 < user2
+        if self.user1_id is not None and self.user2_id is not None and self.user1_id > self.user2_id:
+            self.user1, self.user2 = self.user2, self.user1
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Friendship between {self.user1.username} and {self.user2.username}"
\ No newline at end of file
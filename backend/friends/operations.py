@@ -0,0 +1,105 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from friends.models import FriendRequest, Friendship, canonical_pair
+
+"""Envio e aceite de solicitações de amizade.
+
+Nada de `exists()` antes de escrever: cada operação é feita por statements
+que se apoiam nas restrições do banco (`unique_together` das duas tabelas)
+com `ON CONFLICT DO NOTHING ... RETURNING`, dentro de uma transação.
+
+- Enviar: remove (DELETE ... RETURNING) uma solicitação recíproca pendente;
+  se havia, a amizade é criada na hora. Senão, insere a solicitação, desde
+  que os dois ainda não sejam amigos. 2 statements.
+- Aceitar: DELETE ... RETURNING da solicitação + INSERT da amizade. 2 statements.
+
+SQL portável entre PostgreSQL e SQLite (>= 3.35).
+"""
+
+REQUEST_TABLE = FriendRequest._meta.db_table
+FRIENDSHIP_TABLE = Friendship._meta.db_table
+
+
+class FriendRequestError(Exception):
+    """Erro de regra de negócio; a mensagem vai direto para a API."""
+
+
+class AlreadyFriends(FriendRequestError):
+    pass
+
+
+class AlreadySent(FriendRequestError):
+    pass
+
+
+class RequestNotFound(FriendRequestError):
+    pass
+
+
+def _create_friendship(cursor, user_a, user_b):
+    """INSERT da amizade (par canônico); conflito = já eram amigos. Retorna True se criou."""
+    user1, user2 = canonical_pair(user_a, user_b)
+    cursor.execute(
+        f'INSERT INTO {FRIENDSHIP_TABLE} (user1_id, user2_id, created_at) VALUES (%s, %s, %s) '
+        'ON CONFLICT (user1_id, user2_id) DO NOTHING RETURNING id',
+        [user1, user2, connection.ops.adapt_datetimefield_value(timezone.now())],
+    )
+    return cursor.fetchone() is not None
+
+
+def send_request(from_user_id, to_user_id):
+    """
+    Envia a solicitação. Retorna ('sent', FriendRequest) ou, se o outro
+    usuário já tinha pedido, ('accepted', None) com a amizade criada.
+    Lança AlreadyFriends / AlreadySent.
+    """
+    if from_user_id == to_user_id:
+        raise FriendRequestError('Você não pode enviar uma solicitação para si mesmo.')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Solicitação recíproca pendente: aceita automaticamente
+        cursor.execute(
+            f'DELETE FROM {REQUEST_TABLE} WHERE from_user_id = %s AND to_user_id = %s RETURNING id',
+            [to_user_id, from_user_id],
+        )
+        if cursor.fetchone() is not None:
+            _create_friendship(cursor, from_user_id, to_user_id)
+            return 'accepted', None
+
+        user1, user2 = canonical_pair(from_user_id, to_user_id)
+        now = timezone.now()
+        cursor.execute(
+            f'INSERT INTO {REQUEST_TABLE} (from_user_id, to_user_id, created_at) '
+            f'SELECT %s, %s, %s WHERE NOT EXISTS ('
+            f'SELECT 1 FROM {FRIENDSHIP_TABLE} WHERE user1_id = %s AND user2_id = %s'
+            ') ON CONFLICT (from_user_id, to_user_id) DO NOTHING RETURNING id',
+            [from_user_id, to_user_id, connection.ops.adapt_datetimefield_value(now), user1, user2],
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        # Caminho raro (nada foi inserido): descobre qual restrição barrou
+        if Friendship.objects.between(from_user_id, to_user_id).exists():
+            raise AlreadyFriends('Vocês já são amigos.')
+        raise AlreadySent('Solicitação de amizade já enviada.')
+
+    return 'sent', FriendRequest(id=row[0], from_user_id=from_user_id, to_user_id=to_user_id, created_at=now)
+
+
+def accept_request(request_id, to_user_id):
+    """
+    Aceita a solicitação recebida pelo usuário: remove a solicitação e cria a
+    amizade na mesma transação. Retorna o id do outro usuário.
+    Lança RequestNotFound.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {REQUEST_TABLE} WHERE id = %s AND to_user_id = %s RETURNING from_user_id',
+            [request_id, to_user_id],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            raise RequestNotFound('Solicitação não encontrada.')
+        _create_friendship(cursor, row[0], to_user_id)
+    return row[0]
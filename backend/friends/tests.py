@@ -1,3 +1,94 @@
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from friends.models import FriendRequest, Friendship
+from user.models import CustomUser
+
+
+def create_user(username):
+    return CustomUser.objects.create_user(email=f'{username}@example.com', username=username)
+
+
+class CanonicalFriendshipTests(TestCase):
+    def setUp(self):
+        self.ana = create_user('ana')
+        self.bia = create_user('bia')
+        self.client = APIClient()
+        self.client.force_authenticate(self.ana)
+
+    def test_pairs_are_stored_in_canonical_order(self):
+        friendship = Friendship.objects.create(user1=self.bia, user2=self.ana)
+        self.assertEqual((friendship.user1_id, friendship.user2_id), (self.ana.id, self.bia.id))
+        self.assertTrue(Friendship.objects.between(self.bia, self.ana).exists())
+
+    def test_reversed_rows_are_rejected_by_the_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Friendship.objects.bulk_create([Friendship(user1=self.bia, user2=self.ana)])
+
+    def test_duplicate_pair_is_rejected(self):
+        Friendship.objects.create(user1=self.ana, user2=self.bia)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Friendship.objects.create(user1=self.bia, user2=self.ana)
+
+    def test_destroy_is_a_single_delete(self):
+        Friendship.objects.create(user1=self.bia, user2=self.ana)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/api/v1/friends/{self.bia.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Friendship.objects.exists())
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('DELETE')]), 1)
+        self.assertEqual(self.client.delete(f'/api/v1/friends/{self.bia.id}/').status_code, 404)
+
+
+class FriendRequestQueryCountTests(TestCase):
+    """Statements por chamada de create/accept (benchmark de round-trips)."""
+
+    def setUp(self):
+        self.ana = create_user('ana')
+        self.bia = create_user('bia')
+        self.client = APIClient()
+        self.client.force_authenticate(self.ana)
+
+    def _writes(self, queries):
+        # Ignora o SELECT do serializer (to_user) e o controle de transação
+        return [q['sql'] for q in queries if q['sql'].startswith(('INSERT', 'DELETE', 'UPDATE'))]
+
+    def test_send_is_one_round_trip_per_step(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/friends/request/', {'to_user': self.bia.id})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['from_user']['id'], self.ana.id)
+        # DELETE da recíproca (nada) + INSERT ... ON CONFLICT
+        self.assertEqual(len(self._writes(queries)), 2)
+        self.assertTrue(FriendRequest.objects.filter(from_user=self.ana, to_user=self.bia).exists())
+
+        response = self.client.post('/api/v1/friends/request/', {'to_user': self.bia.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'Solicitação de amizade já enviada.')
+
+    def test_reciprocal_request_is_auto_accepted(self):
+        FriendRequest.objects.create(from_user=self.bia, to_user=self.ana)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/friends/request/', {'to_user': self.bia.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._writes(queries)), 2)
+        self.assertFalse(FriendRequest.objects.exists())
+        self.assertTrue(Friendship.objects.between(self.ana, self.bia).exists())
+
+        response = self.client.post('/api/v1/friends/request/', {'to_user': self.bia.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'Vocês já são amigos.')
+
+    def test_accept_is_two_statements(self):
+        friend_request = FriendRequest.objects.create(from_user=self.bia, to_user=self.ana)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(f'/api/v1/friends/request/{friend_request.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self._writes(queries)), 2)
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('SELECT')]), 0)
+        self.assertTrue(Friendship.objects.between(self.ana, self.bia).exists())
+
+        response = self.client.put(f'/api/v1/friends/request/{friend_request.id}/accept/')
+        self.assertEqual(response.status_code, 404)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Trilha, Modulo, Atividade, ProgressoAtividade
+from .ordering import move_to_edge
+from .models import Trilha, Modulo, Atividade, MatriculaTrilha, ProgressoAtividade
 
 
 @admin.register(Trilha)
@@ -16,6 +17,17 @@ class ModuloAdmin(admin.ModelAdmin):
     search_fields = ('title', 'trilha__title')
     list_filter = ('trilha',)
     ordering = ('trilha', 'order')
+    actions = ['move_to_front', 'move_to_back']
+
+    @admin.action(description='Mover para o início da trilha')
+    def move_to_front(self, request, queryset):
+        moved = move_to_edge(Modulo, 'trilha_id', queryset, front=True)
+        self.message_user(request, f'{moved} módulo(s) movido(s) para o início.')
+
+    @admin.action(description='Mover para o fim da trilha')
+    def move_to_back(self, request, queryset):
+        moved = move_to_edge(Modulo, 'trilha_id', queryset, front=False)
+        self.message_user(request, f'{moved} módulo(s) movido(s) para o fim.')
 
 
 @admin.register(Atividade)
@@ -24,6 +36,17 @@ class AtividadeAdmin(admin.ModelAdmin):
     search_fields = ('title', 'module__title', 'module__trilha__title')
     list_filter = ('module__trilha', 'module')
     ordering = ('module__trilha', 'module', 'order')
+    actions = ['move_to_front', 'move_to_back']
+
+    @admin.action(description='Mover para o início do módulo')
+    def move_to_front(self, request, queryset):
+        moved = move_to_edge(Atividade, 'module_id', queryset, front=True)
+        self.message_user(request, f'{moved} atividade(s) movida(s) para o início.')
+
+    @admin.action(description='Mover para o fim do módulo')
+    def move_to_back(self, request, queryset):
+        moved = move_to_edge(Atividade, 'module_id', queryset, front=False)
+        self.message_user(request, f'{moved} atividade(s) movida(s) para o fim.')
 
 
 @admin.register(ProgressoAtividade)
@@ -32,3 +55,12 @@ class ProgressoAtividadeAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'activity__title', 'activity__module__title')
     list_filter = ('status', 'activity__module__trilha')
     ordering = ('-completed_at',)
+
+
+@admin.register(MatriculaTrilha)
+class MatriculaTrilhaAdmin(admin.ModelAdmin):
+    list_display = ('user', 'trilha', 'completed_count', 'total_count', 'last_activity_at', 'completed_at')
+    search_fields = ('user__username', 'trilha__title')
+    list_filter = ('trilha',)
+    raw_id_fields = ('user', 'last_activity')
+    ordering = ('-last_activity_at',)
@@ -1,11 +1,18 @@
+from django.core.files.storage import default_storage
+from django.urls import reverse
 from rest_framework import serializers
 
-from trilhas.models import Atividade, ProgressoAtividade, Modulo, Trilha
+from trilhas.durations import format_duration
+from trilhas.models import Atividade, MatriculaTrilha, ProgressoAtividade, Modulo, Trilha
+from trilhas.progress import MAX_BATCH_SIZE
 
 
 class AtividadeSerializer(serializers.ModelSerializer):
+    # A árvore é a mesma para todos (vai para o cache): o status do usuário é
+    # aplicado depois, a partir do bitmap da matrícula (ver _merge_progress)
     status = serializers.SerializerMethodField()
-    completed_at = serializers.SerializerMethodField()
+    # O texto não vai na árvore: o front baixa o HTML em `content_url` ao abrir a atividade
+    content_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Atividade
@@ -13,29 +20,25 @@ class AtividadeSerializer(serializers.ModelSerializer):
             'id',
             'title',
             'description',
-            'content',
+            'content_hash',
+            'content_url',
+            'duration',
+            'duration_seconds',
             'order',
             'xp_reward',
             'status',
-            'completed_at',
         ]
-        read_only_fields = ['status', 'completed_at']
+        read_only_fields = ['status']
 
-    def _get_progress_map(self):
-        return self.context.get('progress_map') or {}
+    def get_content_url(self, obj):
+        url = reverse('atividade-content', kwargs={'pk': obj.pk})
+        url = f'{url}?v={obj.content_hash}'
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
     def get_status(self, obj):
-        progress = self._get_progress_map().get(obj.id)
-        if progress:
-            return progress.status
         return ProgressoAtividade.Status.PENDING
 
-    def get_completed_at(self, obj):
-        progress = self._get_progress_map().get(obj.id)
-        if progress and progress.completed_at:
-            return progress.completed_at
-        return None
-
 
 class ModuloSerializer(serializers.ModelSerializer):
     activities = AtividadeSerializer(many=True, read_only=True)
@@ -47,16 +50,65 @@ class ModuloSerializer(serializers.ModelSerializer):
             'title',
             'description',
             'order',
+            'duration_seconds',
             'activities',
         ]
 
 
+class CoverVariantsField(serializers.Field):
+    """
+    Expõe os derivados da capa como URLs:
+    {"webp": {"320": url, ...}, "jpg": {...}, "placeholder": "data:image/webp;base64,..."}
+    Enquanto os derivados não foram gerados, retorna None (o front usa `image`).
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+        result = {'placeholder': value.get('placeholder')}
+        for extension in ('webp', 'jpg'):
+            urls = {}
+            for width, name in value.get(extension, {}).items():
+                url = default_storage.url(name)
+                urls[width] = request.build_absolute_uri(url) if request else url
+            result[extension] = urls
+        return result
+
+
+class TrilhaDurationField(serializers.Field):
+    """
+    Texto da duração total ("2h 30m") calculado a partir de `duration_seconds`;
+    trilhas cujas atividades ainda não têm duração mantêm o texto digitado.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, trilha):
+        if trilha.duration_seconds:
+            return format_duration(trilha.duration_seconds)
+        return trilha.duration
+
+
 class TrilhaListSerializer(serializers.ModelSerializer):
-    # Campo calculado: Conta quantos módulos existem nessa trilha
-    modules_count = serializers.IntegerField(source='modules.count', read_only=True)
-    
-    # Transforma o ID do autor em Nome (String)
+    # Campos calculados via annotate() em TrilhaViewSet.get_queryset (sem query extra por trilha)
+    modules_count = serializers.IntegerField(read_only=True)
+    activities_count = serializers.IntegerField(read_only=True)
+    total_xp = serializers.IntegerField(read_only=True)
+
+    # Transforma o ID do autor em Nome (String); o autor vem do select_related
     author = serializers.StringRelatedField()
+    duration = TrilhaDurationField()
+
+    # URLs dos derivados da capa (WebP/JPEG em larguras fixas + placeholder)
+    image_variants = CoverVariantsField()
 
     class Meta:
         model = Trilha
@@ -68,14 +120,19 @@ class TrilhaListSerializer(serializers.ModelSerializer):
             # Novos campos visuais
             'category',
             'image',
+            'image_variants',
             'author',
             'duration',
+            'duration_seconds',
             'modules_count',
+            'activities_count',
+            'total_xp',
         ]
 
 class TrilhaDetailSerializer(serializers.ModelSerializer):
     modules = ModuloSerializer(many=True, read_only=True)
     author = serializers.StringRelatedField() # Adicionado aqui também
+    duration = TrilhaDurationField()
 
     class Meta:
         model = Trilha
@@ -89,5 +146,49 @@ class TrilhaDetailSerializer(serializers.ModelSerializer):
             'image',
             'author',
             'duration',
+            'duration_seconds',
             'modules', # Mantém a lista de módulos para o detalhe
         ]
+
+
+class BatchCompleteSerializer(serializers.Serializer):
+    activities = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE,
+    )
+
+
+class ReorderSerializer(serializers.Serializer):
+    # Ids de todos os filhos (módulos da trilha ou atividades do módulo) na nova ordem
+    order = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class MatriculaTrilhaSerializer(serializers.ModelSerializer):
+    # Dados da trilha vêm do select_related (painel "minhas trilhas" em uma query)
+    trilha_id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(source='trilha.title', read_only=True)
+    slug = serializers.CharField(source='trilha.slug', read_only=True)
+    category = serializers.CharField(source='trilha.category', read_only=True)
+    image = serializers.ImageField(source='trilha.image', read_only=True)
+    image_variants = CoverVariantsField(source='trilha.image_variants')
+    last_activity_id = serializers.IntegerField(read_only=True)
+    percent = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = MatriculaTrilha
+        fields = [
+            'trilha_id',
+            'title',
+            'slug',
+            'category',
+            'image',
+            'image_variants',
+            'completed_count',
+            'total_count',
+            'percent',
+            'last_activity_id',
+            'last_activity_at',
+            'completed_at',
+            'started_at',
+        ]
@@ -1,45 +1,185 @@
-from django.db import transaction
+import copy
+import re
+
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, Sum, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 # Adicionado Modulo nos imports
-from trilhas.models import Atividade, ProgressoAtividade, Trilha, Modulo
+from trilhas.models import Atividade, MatriculaTrilha, ProgressoAtividade, Trilha, Modulo
+from trilhas import ordering, progress
+from trilhas.bitmaps import is_set
+from trilhas.cache import CURRICULUM_CACHE_TIMEOUT, curriculum_cache_key
+from trilhas.durations import parse_duration
 # Adicionado ModuloSerializer nos imports
 from trilhas.api.v1.serializers import (
     AtividadeSerializer,
+    BatchCompleteSerializer,
+    MatriculaTrilhaSerializer,
+    ReorderSerializer,
     TrilhaDetailSerializer,
     TrilhaListSerializer,
     ModuloSerializer,
 )
 
 
+# Conteúdo versionado pelo hash na URL: um ano de cache no navegador/CDN
+CONTENT_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+
 class TrilhaViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Trilha.objects.all()
     permission_classes = [permissions.AllowAny]
 
+    # Categoria aceita em qualquer caixa (?category=back-end -> 'Back-end')
+    CATEGORY_LOOKUP = {value.lower(): value for value, _ in Trilha.CATEGORIAS}
+    # ?ordering= aceito na listagem (duração usa o índice trilhas_duration_idx)
+    ORDERINGS = {
+        'title': ('title',),
+        '-title': ('-title',),
+        'duration': ('duration_seconds', 'id'),
+        '-duration': ('-duration_seconds', '-id'),
+    }
+
+    def get_queryset(self):
+        queryset = Trilha.objects.select_related('author')
+        if self.action != 'list':
+            return queryset
+
+        category = self.request.query_params.get('category')
+        if category:
+            category = self.CATEGORY_LOOKUP.get(category.lower())
+            if category is None:
+                return queryset.none()
+            queryset = queryset.filter(category=category)
+
+        # ?max_duration=5400 (segundos) ou ?max_duration=1h 30m
+        max_duration = self.request.query_params.get('max_duration')
+        if max_duration:
+            # fullmatch com ASCII: str.isdigit() aceita dígitos Unicode como '²'
+            seconds = int(max_duration) if re.fullmatch(r'[0-9]+', max_duration) else parse_duration(max_duration)
+            if seconds is None:
+                raise ValidationError({'max_duration': 'Use segundos ou um texto como "1h 30m".'})
+            queryset = queryset.filter(duration_seconds__lte=seconds)
+
+        ordering = self.request.query_params.get('ordering')
+        if ordering:
+            if ordering not in self.ORDERINGS:
+                raise ValidationError({'ordering': f"Use um de: {', '.join(self.ORDERINGS)}."})
+            queryset = queryset.order_by(*self.ORDERINGS[ordering])
+
+        # Contadores calculados em uma única query (trilha -> módulos -> atividades)
+        return queryset.annotate(
+            modules_count=Count('modules', distinct=True),
+            activities_count=Count('modules__activities'),
+            total_xp=Coalesce(Sum('modules__activities__xp_reward'), 0),
+        )
+
     def get_serializer_class(self):
         if self.action == 'list':
             return TrilhaListSerializer
         return TrilhaDetailSerializer
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        
-        # Injeta o mapa de progresso apenas se for detalhe e usuário logado
-        if self.action == 'retrieve':
-            user = self.request.user
-            if user.is_authenticated:
-                progress = ProgressoAtividade.objects.filter(
-                    user=user,
-                    # CORREÇÃO: O campo no model Modulo é 'trilha', não 'trail'
-                    activity__module__trilha=self.get_object(),
-                )
-                progress_map = {p.activity_id: p for p in progress}
-                context['progress_map'] = progress_map
-        return context
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalhe da trilha com a árvore de módulos/atividades.
+        A parte independente do usuário fica em cache, com chave
+        (trilha, updated_at); o progresso do usuário vem do bitmap da
+        matrícula (alguns bytes) e é aplicado por cima.
+        """
+        trilha = self.get_object()
+        curriculum = self._get_curriculum(trilha)
+        data = copy.deepcopy(curriculum['tree'])
+
+        data['progress'] = None
+        if request.user.is_authenticated:
+            completed_bits = (
+                MatriculaTrilha.objects.filter(user=request.user, trilha=trilha)
+                .values_list('completed_bits', flat=True)
+                .first()
+            )
+            data['progress'] = self._merge_progress(data, curriculum['bits'], completed_bits or b'')
+        return Response(data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def minhas(self, request):
+        """
+        Painel "minhas trilhas": progresso do usuário em cada trilha iniciada.
+        GET /api/v1/trilhas/minhas/?status=em_andamento|concluidas
+        """
+        enrollments = (
+            MatriculaTrilha.objects.filter(user=request.user)
+            .select_related('trilha')
+            .order_by('-last_activity_at', '-id')
+        )
+        status_filter = request.query_params.get('status')
+        if status_filter == 'em_andamento':
+            enrollments = enrollments.filter(completed_at__isnull=True)
+        elif status_filter == 'concluidas':
+            enrollments = enrollments.filter(completed_at__isnull=False)
+
+        serializer = MatriculaTrilhaSerializer(enrollments, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def reorder_modules(self, request, pk=None):
+        """
+        Reordena todos os módulos da trilha em um único UPDATE.
+        POST /api/v1/trilhas/<id>/reorder_modules/  {"order": [5, 3, 4]}
+        """
+        trilha = self.get_object()
+        return _reorder_response(request, ordering.reorder_modules, trilha.pk)
+
+    def _get_curriculum(self, trilha):
+        """{'tree': dados serializados, 'bits': {id da atividade: progress_bit}} em cache."""
+        key = curriculum_cache_key(trilha, self.request.get_host())
+        curriculum = cache.get(key)
+        if curriculum is None:
+            # Árvore inteira em 2 queries extras (módulos + atividades), sem lazy loading
+            prefetch_related_objects([trilha], Prefetch(
+                'modules',
+                queryset=Modulo.objects.prefetch_related('activities'),
+            ))
+            curriculum = {
+                'tree': TrilhaDetailSerializer(trilha, context={'request': self.request}).data,
+                'bits': {
+                    activity.id: activity.progress_bit
+                    for module in trilha.modules.all()
+                    for activity in module.activities.all()
+                },
+            }
+            cache.set(key, curriculum, CURRICULUM_CACHE_TIMEOUT)
+        return curriculum
+
+    @staticmethod
+    def _merge_progress(data, bit_map, completed_bits):
+        """
+        Marca as atividades concluídas e retorna o resumo do progresso:
+        {'completed', 'total', 'percent', 'next_activity_id'} (próxima atividade na ordem do curso).
+        """
+        completed = total = 0
+        next_activity_id = None
+        for module in data['modules']:
+            for activity in module['activities']:
+                total += 1
+                if is_set(completed_bits, bit_map.get(activity['id'])):
+                    activity['status'] = ProgressoAtividade.Status.COMPLETED
+                    completed += 1
+                elif next_activity_id is None:
+                    next_activity_id = activity['id']
+        return {
+            'completed': completed,
+            'total': total,
+            'percent': completed * 100 // total if total else 0,
+            'next_activity_id': next_activity_id,
+        }
 
 
 # --- NOVO: ViewSet para Módulos ---
@@ -47,6 +187,25 @@ class ModuloViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Modulo.objects.all()
     serializer_class = ModuloSerializer
     permission_classes = [permissions.AllowAny]
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def reorder_activities(self, request, pk=None):
+        """
+        Reordena todas as atividades do módulo em um único UPDATE.
+        POST /api/v1/trilhas/modulos/<id>/reorder_activities/  {"order": [12, 10, 11]}
+        """
+        module = self.get_object()
+        return _reorder_response(request, ordering.reorder_activities, module.pk)
+
+
+def _reorder_response(request, reorder, parent_id):
+    serializer = ReorderSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        new_order = reorder(parent_id, serializer.validated_data['order'])
+    except ordering.ReorderError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response([{'id': pk, 'order': order} for pk, order in new_order.items()])
 # ----------------------------------
 
 
@@ -60,55 +219,67 @@ class AtividadeViewSet(viewsets.GenericViewSet):
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def complete(self, request, pk=None):
         activity = self.get_object()
-        user = request.user
-
-        # Verifica se o usuário completou as atividades anteriores deste módulo
-        previous_activities = Atividade.objects.filter(
-            module=activity.module,
-            order__lt=activity.order
-        ).order_by('-order')
-
-        for prev_activity in previous_activities:
-            if not ProgressoAtividade.objects.filter(
-                user=user,
-                activity=prev_activity,
-                status=ProgressoAtividade.Status.COMPLETED
-            ).exists():
-                return Response(
-                    {'detail': f'Você deve primeiro completar a atividade anterior: "{prev_activity.title}".'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-        with transaction.atomic():
-            # Usa select_for_update para evitar condições de corrida (race conditions)
-            progress, created = ProgressoAtividade.objects.select_for_update().get_or_create(
-                user=user,
-                activity=activity,
-                defaults={
-                    'status': ProgressoAtividade.Status.COMPLETED,
-                    'completed_at': timezone.now()
-                }
-            )
-
-            if not created and progress.status == ProgressoAtividade.Status.COMPLETED:
-                return Response(
-                    {'detail': 'Atividade já concluída.'},
-                    status=status.HTTP_200_OK
-                )
 
-            # Se já existia mas não estava completa, ou acabou de criar
-            progress.status = ProgressoAtividade.Status.COMPLETED
-            progress.completed_at = timezone.now()
-            progress.save()
+        # Verifica (em uma única query) se as atividades anteriores do módulo foram concluídas
+        try:
+            result = progress.complete_activities(request.user, [activity.id])
+        except progress.ProgressionError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Atualiza o XP do usuário (Profile)
-            # Verifica se o usuário tem profile antes de tentar salvar
-            if hasattr(user, 'profile'):
-                profile = user.profile
-                profile.xp += activity.xp_reward
-                profile.save()
+        if not result['completed']:
+            return Response(
+                {'detail': 'Atividade já concluída.'},
+                status=status.HTTP_200_OK
+            )
 
         return Response(
             {'detail': f'Atividade "{activity.title}" concluída com sucesso!'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+    @action(detail=True, methods=['get'])
+    def content(self, request, pk=None):
+        """
+        HTML (já sanitizado) do conteúdo da atividade.
+        GET /api/v1/trilhas/atividades/<id>/content/?v=<content_hash>
+        Com `v` igual ao hash atual a resposta é imutável e pode ficar em cache
+        indefinidamente; sem ele, o cliente revalida com o ETag.
+        """
+        try:
+            activity_id = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+        row = (
+            Atividade.objects.filter(pk=activity_id)
+            .values('id', 'content_hash', 'content_html')
+            .first()
+        )
+        if row is None:
+            raise Http404
+        etag = f'"{row["content_hash"]}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({'id': row['id'], 'content_hash': row['content_hash'], 'html': row['content_html']})
+
+        response['ETag'] = etag
+        if request.query_params.get('v') == row['content_hash']:
+            patch_cache_control(response, public=True, max_age=CONTENT_CACHE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def complete_batch(self, request):
+        """
+        Conclui várias atividades de uma vez (sincronização offline/mobile).
+        POST /api/v1/trilhas/atividades/complete_batch/  {"activities": [1, 2, 3]}
+        Tudo ou nada: se alguma atividade estiver travada, nenhuma é concluída.
+        """
+        serializer = BatchCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = progress.complete_activities(request.user, serializer.validated_data['activities'])
+        except progress.ProgressionError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrilhasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trilhas'
+
+    def ready(self):
+        import trilhas.signals  # Gera os derivados das capas ao salvar uma trilha
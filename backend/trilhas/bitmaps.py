@@ -0,0 +1,168 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from trilhas.models import Atividade, MatriculaTrilha, Modulo, ProgressoAtividade, Trilha
+
+"""Bitmap de progresso por (usuário, trilha).
+
+Cada atividade recebe um `progress_bit` fixo dentro da trilha (reservado em
+`Trilha.next_progress_bit`, nunca reutilizado, então reordenar ou apagar
+atividades não invalida os bitmaps). `MatriculaTrilha.completed_bits` guarda
+os bits das atividades concluídas: o detalhe da trilha monta o progresso a
+partir desses poucos bytes, sem consultar `ProgressoAtividade`, que continua
+sendo a fonte da verdade (ver `manage.py rebuild_progress_bitmaps`).
+"""
+
+BATCH_SIZE = 1000
+
+
+def set_bits(data, bits):
+    """Liga os bits informados e retorna os novos bytes (bit i = byte i // 8, máscara 1 << i % 8)."""
+    bits = [bit for bit in bits if bit is not None]
+    if not bits:
+        return bytes(data or b'')
+    buffer = bytearray(data or b'')
+    needed = max(bits) // 8 + 1
+    if len(buffer) < needed:
+        buffer.extend(b'\0' * (needed - len(buffer)))
+    for bit in bits:
+        buffer[bit // 8] |= 1 << (bit % 8)
+    return bytes(buffer)
+
+
+def is_set(data, bit):
+    if bit is None or not data or bit // 8 >= len(data):
+        return False
+    return bool(data[bit // 8] & (1 << (bit % 8)))
+
+
+def reserve_bits(trilha_id, count):
+    """Reserva `count` bits consecutivos na trilha e retorna o primeiro."""
+    with transaction.atomic():
+        start = (
+            Trilha.objects.select_for_update().filter(pk=trilha_id)
+            .values_list('next_progress_bit', flat=True).first()
+        )
+        if start is None:
+            return None
+        Trilha.objects.filter(pk=trilha_id).update(next_progress_bit=F('next_progress_bit') + count)
+    return start
+
+
+def assign_bit(activity):
+    """Reserva o bit de uma atividade nova (pre_save)."""
+    trilha_id = Modulo.objects.filter(pk=activity.module_id).values_list('trilha_id', flat=True).first()
+    activity.progress_bit = reserve_bits(trilha_id, 1) if trilha_id is not None else None
+
+
+def assign_missing_bits(trilha_ids=None, module_ids=None, force=False):
+    """
+    Atribui bits às atividades que ainda não têm (criadas em lote, por exemplo).
+    Com `force`, reatribui os das atividades dos módulos informados (módulo movido de trilha).
+    """
+    activities = Atividade.objects.order_by('module__order', 'order')
+    if trilha_ids is not None:
+        activities = activities.filter(module__trilha_id__in=trilha_ids)
+    if module_ids is not None:
+        activities = activities.filter(module_id__in=module_ids)
+    if not force:
+        activities = activities.filter(progress_bit__isnull=True)
+
+    by_trilha = {}
+    for pk, trilha_id in activities.values_list('id', 'module__trilha_id'):
+        by_trilha.setdefault(trilha_id, []).append(pk)
+
+    for trilha_id, ids in by_trilha.items():
+        start = reserve_bits(trilha_id, len(ids))
+        Atividade.objects.bulk_update(
+            [Atividade(pk=pk, progress_bit=start + index) for index, pk in enumerate(ids)],
+            ['progress_bit'],
+            batch_size=BATCH_SIZE,
+        )
+    return sum(len(ids) for ids in by_trilha.values())
+
+
+def rebuild(user_ids=None, trilha_ids=None):
+    """
+    Recalcula as matrículas a partir de ProgressoAtividade (criando as que
+    faltarem): bitmap, contadores, última atividade e data de conclusão.
+    Trilhas já concluídas continuam concluídas (como em progress.py), mesmo
+    que novas atividades tenham sido adicionadas depois.
+    Retorna o número de matrículas gravadas.
+    """
+    assign_missing_bits(trilha_ids)
+
+    totals = Atividade.objects.order_by().values('module__trilha_id').annotate(total=Count('id'))
+    if trilha_ids is not None:
+        totals = totals.filter(module__trilha_id__in=trilha_ids)
+    totals = {row['module__trilha_id']: row['total'] for row in totals}
+
+    progress = ProgressoAtividade.objects.filter(status=ProgressoAtividade.Status.COMPLETED)
+    enrollments = MatriculaTrilha.objects.all()
+    if user_ids is not None:
+        progress = progress.filter(user_id__in=user_ids)
+        enrollments = enrollments.filter(user_id__in=user_ids)
+    if trilha_ids is not None:
+        progress = progress.filter(activity__module__trilha_id__in=trilha_ids)
+        enrollments = enrollments.filter(trilha_id__in=trilha_ids)
+
+    rows = (
+        # Empates de completed_at (conclusão em lote) na mesma ordem de progress.py
+        progress.order_by('user_id', 'completed_at', 'activity__module_id', 'activity__order')
+        .values_list('user_id', 'activity__module__trilha_id', 'activity_id', 'activity__progress_bit', 'completed_at')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    completed_before = {
+        (user_id, trilha_id): completed_at
+        for user_id, trilha_id, completed_at in enrollments.filter(completed_at__isnull=False)
+        .values_list('user_id', 'trilha_id', 'completed_at')
+    }
+
+    written = 0
+    with transaction.atomic():
+        # Matrículas sem nenhum progresso restante voltam a zero
+        enrollments.update(completed_bits=b'', completed_count=0, last_activity=None, last_activity_at=None)
+
+        pending = {}
+        last_user = None
+        for user_id, trilha_id, activity_id, bit, completed_at in rows:
+            if user_id != last_user and len(pending) >= BATCH_SIZE:
+                written += _flush(pending, totals, completed_before)
+                pending = {}
+            last_user = user_id
+            bits, count, last = pending.get((user_id, trilha_id), ([], 0, (None, None)))
+            bits.append(bit)
+            if completed_at and (last[0] is None or completed_at >= last[0]):
+                last = (completed_at, activity_id)
+            pending[(user_id, trilha_id)] = (bits, count + 1, last)
+        written += _flush(pending, totals, completed_before)
+    return written
+
+
+def _flush(pending, totals, completed_before):
+    enrollments = []
+    for (user_id, trilha_id), (bits, count, (last_at, last_activity_id)) in pending.items():
+        total = totals.get(trilha_id, 0)
+        completed_at = completed_before.get((user_id, trilha_id))
+        if completed_at is None and total and count >= total:
+            completed_at = last_at
+        enrollments.append(MatriculaTrilha(
+            user_id=user_id,
+            trilha_id=trilha_id,
+            completed_bits=set_bits(b'', bits),
+            completed_count=count,
+            total_count=total,
+            last_activity_id=last_activity_id,
+            last_activity_at=last_at,
+            completed_at=completed_at,
+        ))
+    MatriculaTrilha.objects.bulk_create(
+        enrollments,
+        update_conflicts=True,
+        unique_fields=['user', 'trilha'],
+        update_fields=[
+            'completed_bits', 'completed_count', 'total_count', 'last_activity', 'last_activity_at', 'completed_at',
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return len(pending)
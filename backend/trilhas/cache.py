@@ -0,0 +1,23 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from trilhas.models import Trilha
+
+"""Cache da árvore de conteúdo (módulos + atividades) do detalhe da trilha.
+
+A chave inclui `Trilha.updated_at`: qualquer alteração na trilha, em um
+módulo ou em uma atividade atualiza esse campo (ver trilhas/signals.py) e
+as entradas antigas simplesmente deixam de ser lidas até expirarem.
+"""
+
+CURRICULUM_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def curriculum_cache_key(trilha, host=''):
+    return f'trilhas:curriculum:v3:{trilha.pk}:{trilha.updated_at.timestamp()}:{host}'
+
+
+def touch_trilha(trilha_id=None, module_id=None):
+    """Invalida o cache da árvore atualizando `updated_at` da trilha (sem disparar save)."""
+    condition = Q(pk=trilha_id) if trilha_id is not None else Q(modules__id=module_id)
+    Trilha.objects.filter(condition).update(updated_at=timezone.now())
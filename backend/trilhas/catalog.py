@@ -0,0 +1,346 @@
+import json
+import time
+
+import yaml
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_slug
+from django.db import models, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from trilhas.bitmaps import assign_missing_bits
+from trilhas.content import render_activity
+from trilhas.durations import parse_duration, recompute_totals
+from trilhas.models import Atividade, MatriculaTrilha, Modulo, Trilha
+
+"""Importação/exportação do catálogo de trilhas (árvores JSON ou YAML).
+
+Formato:
+
+    {"trilhas": [{"slug": "...", "title": "...", "category": "Back-end",
+                  "author": "email@exemplo.com", "modules": [
+                      {"order": 1, "title": "...", "activities": [
+                          {"order": 1, "title": "...", "type": "text", "xp_reward": 10}]}]}]}
+
+A identidade de cada nó é natural: trilha pelo `slug`, módulo por
+(trilha, order) e atividade por (módulo, order). A importação valida toda a
+árvore em memória e grava com um `bulk_create(update_conflicts=True)` por
+nível, dentro de uma única transação: rodar o mesmo arquivo duas vezes não
+cria duplicatas. Campos omitidos no arquivo (inclusive `author`) mantêm o
+valor atual das linhas existentes.
+"""
+
+TRILHA_FIELDS = ('title', 'description', 'category', 'duration')
+MODULE_FIELDS = ('title', 'description')
+ACTIVITY_FIELDS = ('title', 'type', 'description', 'content', 'video_url', 'duration', 'xp_reward')
+
+CATEGORIES = {value for value, _ in Trilha.CATEGORIAS}
+ACTIVITY_TYPES = {value for value, _ in Atividade.TYPES}
+
+
+class CatalogError(Exception):
+    """Arquivo inválido; `errors` traz todos os problemas encontrados."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('\n'.join(errors))
+
+
+def load(stream, fmt):
+    try:
+        data = yaml.safe_load(stream) if fmt == 'yaml' else json.load(stream)
+    except (yaml.YAMLError, ValueError) as exc:
+        raise CatalogError([f'Não foi possível ler o {fmt.upper()}: {exc}'])
+    if not isinstance(data, dict) or not isinstance(data.get('trilhas'), list):
+        raise CatalogError(['O arquivo deve ter uma lista "trilhas" na raiz.'])
+    return data['trilhas']
+
+
+def dump(trilhas, stream, fmt):
+    document = {'trilhas': trilhas}
+    if fmt == 'yaml':
+        yaml.safe_dump(document, stream, allow_unicode=True, sort_keys=False)
+    else:
+        json.dump(document, stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
+
+
+def _check_order(items, where, errors):
+    """Confere a lista de módulos/atividades; retorna só os itens que são objetos."""
+    if not isinstance(items, list):
+        errors.append(f'{where}: deve ser uma lista.')
+        return []
+    seen = set()
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(f'{where}[{index}]: deve ser um objeto.')
+            continue
+        valid.append(item)
+        order = item.get('order')
+        if not isinstance(order, int) or isinstance(order, bool) or order < 1:
+            errors.append(f'{where}[{index}]: "order" deve ser um inteiro positivo.')
+        elif order in seen:
+            errors.append(f'{where}: "order" {order} repetido.')
+        else:
+            seen.add(order)
+        if not item.get('title'):
+            errors.append(f'{where}[{index}]: "title" é obrigatório.')
+    return valid
+
+
+def _check_fields(model, item, fields, where, errors):
+    """Tipos e tamanhos dos campos presentes, pelos próprios campos do modelo."""
+    for name in fields:
+        if name not in item:
+            continue
+        value = item[name]
+        field = model._meta.get_field(name)
+        if isinstance(field, models.PositiveIntegerField):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                errors.append(f'{where}: "{name}" deve ser um inteiro não negativo.')
+            continue
+        if value is None and field.null:
+            continue
+        if not isinstance(value, str):
+            errors.append(f'{where}: "{name}" deve ser texto.')
+        elif field.max_length and len(value) > field.max_length:
+            errors.append(f'{where}: "{name}" excede {field.max_length} caracteres.')
+        elif isinstance(field, models.URLField) and value:
+            try:
+                URLValidator()(value)
+            except ValidationError:
+                errors.append(f'{where}: "{name}" não é uma URL válida.')
+
+
+def validate(trilhas):
+    """
+    Valida a árvore inteira antes de tocar no banco: estrutura, slugs únicos
+    e bem formados, ordens únicas por (trilha, order) e (módulo, order),
+    categorias e tipos válidos, tipos e tamanhos dos campos e autores
+    existentes.
+    """
+    errors = []
+    slugs = set()
+    authors = {}
+    slug_length = Trilha._meta.get_field('slug').max_length
+    for index, trilha in enumerate(trilhas):
+        if not isinstance(trilha, dict):
+            errors.append(f'trilhas[{index}]: deve ser um objeto.')
+            continue
+        slug = trilha.get('slug')
+        where = f'trilha "{slug or index}"'
+        if not slug:
+            errors.append(f'trilhas[{index}]: "slug" é obrigatório.')
+        elif not isinstance(slug, str) or len(slug) > slug_length:
+            errors.append(f'{where}: "slug" deve ser texto com até {slug_length} caracteres.')
+        else:
+            try:
+                validate_slug(slug)
+            except ValidationError:
+                errors.append(f'{where}: "slug" deve ter apenas letras, números, "-" e "_".')
+            if slug in slugs:
+                errors.append(f'{where}: slug repetido.')
+            slugs.add(slug)
+        if not trilha.get('title'):
+            errors.append(f'{where}: "title" é obrigatório.')
+        category = trilha.get('category', 'Fundamentos')
+        if isinstance(category, str) and category not in CATEGORIES:
+            errors.append(f'{where}: categoria inválida "{trilha.get("category")}".')
+        author = trilha.get('author')
+        if isinstance(author, str):
+            if author:
+                authors.setdefault(author, []).append(where)
+        elif author is not None:
+            errors.append(f'{where}: "author" deve ser o e-mail do autor.')
+        _check_fields(Trilha, trilha, TRILHA_FIELDS, where, errors)
+
+        modules = _check_order(trilha.get('modules') or [], f'{where} módulos', errors)
+        for module in modules:
+            module_where = f'{where} módulo {module.get("order")}'
+            _check_fields(Modulo, module, MODULE_FIELDS, module_where, errors)
+            activities = _check_order(module.get('activities') or [], f'{module_where} atividades', errors)
+            for activity in activities:
+                activity_where = f'{module_where} atividade {activity.get("order")}'
+                activity_type = activity.get('type', 'text')
+                if isinstance(activity_type, str) and activity_type not in ACTIVITY_TYPES:
+                    errors.append(f'{activity_where}: tipo inválido "{activity.get("type")}".')
+                _check_fields(Atividade, activity, ACTIVITY_FIELDS, activity_where, errors)
+
+    # Um e-mail digitado errado apagaria o autor atual das trilhas existentes
+    for email in sorted(set(authors) - set(_author_ids(authors))):
+        for where in authors[email]:
+            errors.append(f'{where}: autor "{email}" não encontrado.')
+    if errors:
+        raise CatalogError(errors)
+
+
+def _author_ids(emails):
+    """{e-mail: id} dos usuários existentes entre os e-mails informados."""
+    if not emails:
+        return {}
+    return dict(get_user_model().objects.filter(email__in=list(emails)).values_list('email', 'id'))
+
+
+def _upsert(model, rows, unique_fields):
+    """
+    `rows`: [(objeto, campos vindos do arquivo)]. Um bulk_create por conjunto
+    de campos: o que o arquivo omite não sobrescreve as linhas existentes.
+    """
+    groups = {}
+    for obj, fields in rows:
+        groups.setdefault(tuple(fields), []).append(obj)
+    for fields, objects in groups.items():
+        model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=list(fields),
+            batch_size=500,
+        )
+
+
+@transaction.atomic
+def import_catalog(trilhas, prune=False, timings=None):
+    """
+    Grava a árvore já validada. Com `prune`, remove módulos/atividades das
+    trilhas importadas que não estão no arquivo.
+    `timings` (dict opcional) recebe a duração de cada etapa.
+    Retorna {'trilhas': n, 'modules': n, 'activities': n, 'pruned': n}.
+    """
+    timings = {} if timings is None else timings
+    clock = _Clock(timings)
+    now = timezone.now()
+
+    emails = {t['author'] for t in trilhas if t.get('author')}
+    authors = _author_ids(emails)
+    if emails - set(authors):
+        raise CatalogError([f'Autor "{email}" não encontrado.' for email in sorted(emails - set(authors))])
+
+    rows = []
+    for t in trilhas:
+        fields = [field for field in TRILHA_FIELDS if field in t]
+        trilha = Trilha(slug=t['slug'], updated_at=now, **{field: t[field] for field in fields})
+        # Sem "author" no arquivo o autor atual é mantido; "author": null remove
+        if 'author' in t:
+            trilha.author_id = authors[t['author']] if t['author'] else None
+            fields.append('author')
+        rows.append((trilha, [*fields, 'updated_at']))
+    _upsert(Trilha, rows, ['slug'])
+    trilha_ids = dict(Trilha.objects.filter(slug__in=[t['slug'] for t in trilhas]).values_list('slug', 'id'))
+    clock.lap('trilhas')
+
+    modules = [
+        (
+            Modulo(trilha_id=trilha_ids[t['slug']], order=m['order'], **{f: m[f] for f in MODULE_FIELDS if f in m}),
+            [f for f in MODULE_FIELDS if f in m],
+        )
+        for t in trilhas for m in t.get('modules') or []
+    ]
+    _upsert(Modulo, modules, ['trilha', 'order'])
+    module_ids = {
+        (trilha_id, order): pk
+        for pk, trilha_id, order in Modulo.objects.filter(trilha_id__in=trilha_ids.values())
+        .values_list('id', 'trilha_id', 'order')
+    }
+    clock.lap('modules')
+
+    activities = []
+    for t in trilhas:
+        for m in t.get('modules') or []:
+            module_id = module_ids[(trilha_ids[t['slug']], m['order'])]
+            for a in m.get('activities') or []:
+                fields = [f for f in ACTIVITY_FIELDS if f in a]
+                activity = Atividade(module_id=module_id, order=a['order'], **{f: a[f] for f in fields})
+                # bulk_create não dispara signals: renderiza o Markdown e converte a duração aqui
+                render_activity(activity)
+                activity.duration_seconds = parse_duration(activity.duration) or 0
+                if 'content' in a:
+                    fields += ['content_html', 'content_hash']
+                if 'duration' in a:
+                    fields.append('duration_seconds')
+                activities.append((activity, fields))
+    _upsert(Atividade, activities, ['module', 'order'])
+    clock.lap('activities')
+
+    pruned = 0
+    if prune:
+        keep_modules = {(trilha_ids[t['slug']], m['order']) for t in trilhas for m in t.get('modules') or []}
+        keep_activities = {
+            (module_ids[(trilha_ids[t['slug']], m['order'])], a['order'])
+            for t in trilhas for m in t.get('modules') or [] for a in m.get('activities') or []
+        }
+        stale_modules = [pk for key, pk in module_ids.items() if key not in keep_modules]
+        stale_activities = [
+            pk for pk, module_id, order in Atividade.objects.filter(module_id__in=module_ids.values())
+            .values_list('id', 'module_id', 'order')
+            if module_id not in stale_modules and (module_id, order) not in keep_activities
+        ]
+        pruned += Atividade.objects.filter(pk__in=stale_activities).delete()[1].get(Atividade._meta.label, 0)
+        pruned += Modulo.objects.filter(pk__in=stale_modules).delete()[1].get(Modulo._meta.label, 0)
+        clock.lap('prune')
+
+    # Efeitos que os signals fariam: totais de duração, cache da árvore e totais das matrículas
+    recompute_totals(trilha_ids.values())
+    assign_missing_bits(trilha_ids.values())
+    Trilha.objects.filter(pk__in=trilha_ids.values()).update(updated_at=now)
+    totals = (
+        Atividade.objects.filter(module__trilha=OuterRef('trilha'))
+        .order_by()
+        .values('module__trilha')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    MatriculaTrilha.objects.filter(trilha_id__in=trilha_ids.values()).update(
+        total_count=Coalesce(Subquery(totals, output_field=IntegerField()), 0),
+    )
+    clock.lap('counters')
+
+    return {
+        'trilhas': len(trilha_ids),
+        'modules': len(modules),
+        'activities': len(activities),
+        'pruned': pruned,
+    }
+
+
+def export_catalog(slugs=None):
+    """Árvore das trilhas (todas ou as dos slugs informados), pronta para `dump`."""
+    queryset = Trilha.objects.select_related('author').prefetch_related('modules__activities').order_by('slug')
+    if slugs:
+        queryset = queryset.filter(slug__in=slugs)
+
+    result = []
+    for trilha in queryset:
+        result.append({
+            'slug': trilha.slug,
+            **{field: getattr(trilha, field) for field in TRILHA_FIELDS},
+            'author': trilha.author.email if trilha.author else None,
+            'modules': [
+                {
+                    'order': module.order,
+                    **{field: getattr(module, field) for field in MODULE_FIELDS},
+                    'activities': [
+                        {'order': activity.order, **{field: getattr(activity, field) for field in ACTIVITY_FIELDS}}
+                        for activity in module.activities.all()
+                    ],
+                }
+                for module in trilha.modules.all()
+            ],
+        })
+    return result
+
+
+class _Clock:
+    """Acumula em `timings` a duração de cada etapa (time.monotonic)."""
+
+    def __init__(self, timings):
+        self._timings = timings
+        self._last = time.monotonic()
+
+    def lap(self, name):
+        now = time.monotonic()
+        self._timings[name] = now - self._last
+        self._last = now
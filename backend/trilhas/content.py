@@ -0,0 +1,58 @@
+import hashlib
+
+import markdown
+import nh3
+
+"""Conteúdo das atividades: Markdown renderizado uma única vez, ao salvar.
+
+`Atividade.content_html` guarda o HTML já sanitizado e `content_hash` a
+versão desse HTML. O detalhe da trilha envia apenas o hash; o texto é
+baixado sob demanda em /atividades/<id>/content/?v=<hash>, que pode ficar
+em cache por tempo indeterminado (o hash muda quando o conteúdo muda).
+"""
+
+# Altere ao mudar extensões ou regras de sanitização: força nova renderização
+RENDERER_VERSION = '1'
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'nl2br']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'span',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'code': {'class'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'align'},
+    'th': {'align'},
+}
+
+
+def content_hash(text):
+    return hashlib.sha256(f'{RENDERER_VERSION}:{text}'.encode('utf-8')).hexdigest()[:32]
+
+
+def render_markdown(text):
+    """Markdown -> HTML sanitizado (sem scripts, estilos ou atributos de evento)."""
+    if not text:
+        return ''
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS, output_format='html')
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={'http', 'https', 'mailto'},
+        link_rel='noopener noreferrer nofollow',
+    )
+
+
+def render_activity(activity):
+    """Atualiza `content_html`/`content_hash` se o Markdown mudou. Retorna True se renderizou."""
+    digest = content_hash(activity.content)
+    if digest == activity.content_hash:
+        return False
+    activity.content_html = render_markdown(activity.content)
+    activity.content_hash = digest
+    return True
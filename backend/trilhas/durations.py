@@ -0,0 +1,102 @@
+import re
+
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from trilhas.models import Atividade, Modulo, Trilha
+
+"""Durações em segundos.
+
+Os editores continuam digitando `Atividade.duration` como texto ("10 min",
+"1h 30m", "05:30"); o texto é convertido em `duration_seconds` ao salvar e os
+totais de `Modulo` são mantidos por deltas (ver trilhas/signals.py). O total da
+`Trilha` é a soma dos módulos ou, enquanto as atividades não têm duração, o
+texto digitado em `Trilha.duration` ("40h 30m").
+"""
+
+UNIT_SECONDS = {
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hora': 3600, 'horas': 3600,
+    'm': 60, 'min': 60, 'mins': 60, 'minuto': 60, 'minutos': 60,
+    's': 1, 'seg': 1, 'segundo': 1, 'segundos': 1,
+}
+TOKEN_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*([a-z]*)')
+CLOCK_RE = re.compile(r'^(?:(\d+):)?(\d{1,2}):(\d{2})$')
+
+
+def parse_duration(text):
+    """
+    "2h 30m" / "10 min" / "1:30:00" / "05:30" -> segundos.
+    Número sem unidade conta como minutos. Retorna None se não entender o texto.
+    """
+    text = (text or '').strip().lower()
+    if not text:
+        return 0
+
+    clock = CLOCK_RE.match(text)
+    if clock:
+        hours, minutes, seconds = clock.groups()
+        if hours is None:
+            # "05:30" = minutos:segundos
+            return int(minutes) * 60 + int(seconds)
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+    total, matched = 0, False
+    for number, unit in TOKEN_RE.findall(text):
+        factor = UNIT_SECONDS.get(unit or 'min')
+        if factor is None:
+            return None
+        total += round(float(number.replace(',', '.')) * factor)
+        matched = True
+    return total if matched else None
+
+
+def format_duration(seconds):
+    """Segundos -> "2h 30m" (mesmo formato usado nos cards)."""
+    minutes = round((seconds or 0) / 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}h {minutes:02d}m'
+
+
+def trilha_seconds(activities_total, declared):
+    """Soma das atividades; sem ela, a duração declarada na própria trilha."""
+    return activities_total or parse_duration(declared) or 0
+
+
+def refresh_trilha_totals(trilha_ids):
+    """Recalcula `Trilha.duration_seconds` a partir dos módulos (um SELECT e um UPDATE)."""
+    rows = (
+        Trilha.objects.filter(pk__in=trilha_ids)
+        .order_by()
+        .annotate(total=Coalesce(Sum('modules__duration_seconds'), 0))
+        .values_list('id', 'duration', 'total')
+    )
+    Trilha.objects.bulk_update(
+        [Trilha(id=pk, duration_seconds=trilha_seconds(total, duration)) for pk, duration, total in rows],
+        ['duration_seconds'],
+    )
+
+
+def recompute_totals(trilha_ids):
+    """
+    Recalcula do zero os totais dos módulos e das trilhas informadas.
+    Usado por caminhos que não disparam signals (importação em lote, migrations).
+    """
+    module_totals = (
+        Atividade.objects.filter(module=OuterRef('pk'))
+        .order_by()
+        .values('module')
+        .annotate(total=Sum('duration_seconds'))
+        .values('total')
+    )
+    Modulo.objects.filter(trilha_id__in=trilha_ids).update(
+        duration_seconds=Coalesce(Subquery(module_totals, output_field=IntegerField()), 0),
+    )
+    refresh_trilha_totals(trilha_ids)
+
+
+def apply_delta(module_id, delta):
+    """Soma `delta` segundos ao módulo (UPDATE com F()) e recalcula o total da trilha dele."""
+    if not delta or module_id is None:
+        return
+    Modulo.objects.filter(pk=module_id).update(duration_seconds=F('duration_seconds') + delta)
+    refresh_trilha_totals(Modulo.objects.filter(pk=module_id).values('trilha_id'))
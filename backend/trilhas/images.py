@@ -0,0 +1,168 @@
+import atexit
+import base64
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+"""Derivados pré-calculados das capas de trilhas.
+
+Ao salvar uma capa, geramos versões com larguras fixas em WebP e JPEG e um
+placeholder minúsculo e desfocado (data URI) para exibir enquanto a imagem
+carrega. O redimensionamento roda em um ProcessPoolExecutor: o save do admin
+apenas agenda o trabalho e o resultado é gravado em `Trilha.image_variants`.
+
+Cada processo web tem o próprio pool, criado sob demanda com processos
+`spawn` (nunca `fork` de um worker com threads), descartado em processos
+filhos de fork (gunicorn --preload) e encerrado na saída do processo; o que
+ficar pendente num reload é refeito pelo comando `build_cover_variants`. Com
+TRILHA_COVER_WORKERS = 0 não há pool: o trabalho é feito no próprio save.
+"""
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = (('webp', 'WEBP'), ('jpg', 'JPEG'))
+VARIANT_QUALITY = 80
+VARIANTS_DIR = 'trilhas/covers/variants'
+PLACEHOLDER_WIDTH = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_variants(data):
+    """
+    Gera os derivados a partir dos bytes da imagem original.
+    Função pura (sem Django) para rodar em um processo do pool.
+    Retorna ({'<largura>.<ext>': bytes}, placeholder_data_uri).
+    """
+    from PIL import Image, ImageFilter, ImageOps
+
+    files = {}
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    for width in VARIANT_WIDTHS:
+        # Não amplia imagens pequenas: a menor variante usa a largura original
+        if width > image.width and width != VARIANT_WIDTHS[0]:
+            continue
+        target = min(width, image.width)
+        height = max(1, round(image.height * target / image.width))
+        resized = image.resize((target, height), Image.LANCZOS) if target != image.width else image
+        for extension, pil_format in VARIANT_FORMATS:
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, quality=VARIANT_QUALITY)
+            files[f'{width}.{extension}'] = buffer.getvalue()
+
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, 'WEBP', quality=30)
+    placeholder = 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    return files, placeholder
+
+
+def store_variants(source_name, data, files, placeholder):
+    """
+    Salva os derivados no storage, em uma pasta endereçada pelo conteúdo da
+    imagem original, e retorna o dicionário guardado em `Trilha.image_variants`.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    variants = {'source': source_name, 'placeholder': placeholder}
+    for filename, content in files.items():
+        width, extension = filename.split('.')
+        name = f'{VARIANTS_DIR}/{digest}/{filename}'
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        variants.setdefault(extension, {})[width] = name
+    return variants
+
+
+def read_source(name):
+    with default_storage.open(name, 'rb') as source:
+        return source.read()
+
+
+def needs_variants(trilha):
+    return bool(trilha.image) and trilha.image_variants.get('source') != trilha.image.name
+
+
+def clear_stale_variants(trilha):
+    """Capa removida: descarta os derivados da capa antiga. Retorna True se algo mudou."""
+    if trilha.image or not trilha.image_variants:
+        return False
+    trilha.image_variants = {}
+    return True
+
+
+def get_executor():
+    """Pool de processos compartilhado pelo processo web (criado sob demanda)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.TRILHA_COVER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+@atexit.register
+def shutdown_executor():
+    """Encerra o pool (sem esperar trabalhos pendentes; o comando os refaz)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _forget_executor():
+    # O filho de um fork não é dono dos processos do pool herdado
+    global _executor, _executor_lock
+    _executor, _executor_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_executor)
+
+
+def _save_result(trilha_id, source_name, data, future):
+    """Callback do Future: grava os derivados se a capa ainda for a mesma."""
+    from trilhas.models import Trilha
+
+    try:
+        files, placeholder = future.result()
+        variants = store_variants(source_name, data, files, placeholder)
+        Trilha.objects.filter(pk=trilha_id, image=source_name).update(image_variants=variants)
+    except Exception:
+        logger.exception('Falha ao gerar derivados da capa da trilha %s', trilha_id)
+    finally:
+        # O callback roda em uma thread do pool: libera a conexão aberta por ela
+        connection.close()
+
+
+def schedule_variants(trilha):
+    """
+    Agenda a geração dos derivados da capa atual da trilha.
+    Com TRILHA_COVER_WORKERS = 0 o trabalho é feito na hora (útil em testes).
+    """
+    source_name = trilha.image.name
+    data = read_source(source_name)
+
+    if not settings.TRILHA_COVER_WORKERS:
+        files, placeholder = render_variants(data)
+        variants = store_variants(source_name, data, files, placeholder)
+        type(trilha).objects.filter(pk=trilha.pk, image=source_name).update(image_variants=variants)
+        return
+
+    future = get_executor().submit(render_variants, data)
+    future.add_done_callback(lambda f: _save_result(trilha.pk, source_name, data, f))
@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from trilhas.images import needs_variants, read_source, render_variants, store_variants
+from trilhas.models import Trilha
+
+
+class Command(BaseCommand):
+    help = "Gera (em paralelo) os derivados WebP/JPEG e o placeholder das capas de trilhas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Número de processos usados no redimensionamento.',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regera os derivados mesmo das capas que já estão atualizadas.',
+        )
+
+    def handle(self, *args, workers, force, **options):
+        started = time.monotonic()
+        trilhas = [
+            trilha for trilha in Trilha.objects.exclude(image='').exclude(image__isnull=True)
+            .only('id', 'image', 'image_variants')
+            if force or needs_variants(trilha)
+        ]
+        if not trilhas:
+            self.stdout.write('Nenhuma capa para processar.')
+            return
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for trilha in trilhas:
+                try:
+                    data = read_source(trilha.image.name)
+                except OSError as exc:
+                    failed += 1
+                    self.stderr.write(f'[{trilha.pk}] arquivo não encontrado: {trilha.image.name} ({exc})')
+                    continue
+                futures[executor.submit(render_variants, data)] = (trilha, data)
+
+            for future in as_completed(futures):
+                trilha, data = futures[future]
+                try:
+                    files, placeholder = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'[{trilha.pk}] falha ao processar {trilha.image.name}: {exc}')
+                    continue
+                variants = store_variants(trilha.image.name, data, files, placeholder)
+                Trilha.objects.filter(pk=trilha.pk, image=trilha.image.name).update(image_variants=variants)
+                done += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{done} capa(s) processada(s), {failed} falha(s) em {elapsed:.1f}s com {workers} processo(s).'
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trilhas import catalog
+from trilhas.management.commands.import_trilhas import detect_format
+
+
+class Command(BaseCommand):
+    help = "Exporta trilhas, módulos e atividades para JSON/YAML (formato aceito por import_trilhas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Slugs das trilhas (padrão: todas).')
+        parser.add_argument('-o', '--output', default='-', help='Arquivo de saída ("-" para a saída padrão).')
+        parser.add_argument('--format', choices=['json', 'yaml'], help='Padrão: pela extensão do arquivo.')
+
+    def handle(self, *args, slugs, output, format, **options):
+        started = time.monotonic()
+        trilhas = catalog.export_catalog(slugs)
+        missing = set(slugs) - {t['slug'] for t in trilhas}
+        if missing:
+            raise CommandError(f'Trilha(s) não encontrada(s): {", ".join(sorted(missing))}.')
+
+        fmt = detect_format(output, format)
+        if output == '-':
+            # json/yaml escrevem em pedaços: sem a quebra de linha automática do OutputWrapper
+            self.stdout.ending = ''
+            catalog.dump(trilhas, self.stdout, fmt)
+        else:
+            with open(output, 'w', encoding='utf-8') as stream:
+                catalog.dump(trilhas, stream, fmt)
+
+        modules = sum(len(t['modules']) for t in trilhas)
+        activities = sum(len(m['activities']) for t in trilhas for m in t['modules'])
+        # Com saída padrão, o resumo vai para stderr para não corromper o arquivo
+        report = self.stdout if output != '-' else self.stderr
+        report.write(
+            f'{len(trilhas)} trilha(s), {modules} módulo(s) e {activities} atividade(s) '
+            f'exportados em {time.monotonic() - started:.2f}s.'
+        )
@@ -0,0 +1,56 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trilhas import catalog
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'yaml' if path.endswith(('.yaml', '.yml')) else 'json'
+
+
+class Command(BaseCommand):
+    help = "Importa (upsert em lote) trilhas, módulos e atividades de um arquivo JSON/YAML."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo JSON/YAML ("-" para ler da entrada padrão).')
+        parser.add_argument('--format', choices=['json', 'yaml'], help='Padrão: pela extensão do arquivo.')
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Remove módulos/atividades das trilhas importadas que não estão no arquivo (e o progresso ligado a eles).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Apenas valida o arquivo.')
+
+    def handle(self, *args, path, format, prune, dry_run, **options):
+        started = time.monotonic()
+        fmt = detect_format(path, format)
+        try:
+            if path == '-':
+                trilhas = catalog.load(sys.stdin, fmt)
+            else:
+                with open(path, encoding='utf-8') as stream:
+                    trilhas = catalog.load(stream, fmt)
+            timings = {'parse': time.monotonic() - started}
+
+            lap = time.monotonic()
+            catalog.validate(trilhas)
+            timings['validate'] = time.monotonic() - lap
+        except OSError as exc:
+            raise CommandError(f'Não foi possível ler {path}: {exc}')
+        except (ValueError, catalog.CatalogError) as exc:
+            raise CommandError(f'Arquivo inválido:\n{exc}')
+
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f'{len(trilhas)} trilha(s) válida(s).'))
+            return
+
+        result = catalog.import_catalog(trilhas, prune=prune, timings=timings)
+
+        self.stdout.write(', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['trilhas']} trilha(s), {result['modules']} módulo(s) e {result['activities']} atividade(s) "
+            f"importados, {result['pruned']} removido(s) em {time.monotonic() - started:.2f}s."
+        ))
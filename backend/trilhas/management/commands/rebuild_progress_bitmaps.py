@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trilhas import bitmaps
+
+
+class Command(BaseCommand):
+    help = "Recalcula as matrículas (bitmaps, contadores, última atividade, conclusão) a partir de ProgressoAtividade."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Apenas este usuário (repetível).')
+        parser.add_argument('--trilha', type=int, action='append', dest='trilhas', help='Apenas esta trilha (repetível).')
+
+    def handle(self, *args, users, trilhas, **options):
+        started = time.monotonic()
+        written = bitmaps.rebuild(user_ids=users, trilha_ids=trilhas)
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} matrícula(s) recalculada(s) em {time.monotonic() - started:.2f}s.'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0003_atividade_duration_atividade_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trilha',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0004_trilha_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trilha',
+            index=models.Index(fields=['category', 'title'], name='trilhas_category_title_idx'),
+        ),
+    ]
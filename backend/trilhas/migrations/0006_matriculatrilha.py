@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0005_trilha_trilhas_category_title_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatriculaTrilha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('last_activity', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='trilhas.atividade')),
+                ('trilha', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='trilhas.trilha')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trilha_enrollments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_activity_at'], name='trilhas_enrollment_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'trilha'), name='trilhas_enrollment_user_trilha_uniq')],
+            },
+        ),
+    ]
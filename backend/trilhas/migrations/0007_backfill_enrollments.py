@@ -0,0 +1,56 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:46
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+BATCH_SIZE = 1000
+
+
+def backfill_enrollments(apps, schema_editor):
+    """
+    Cria uma matrícula para cada (usuário, trilha) com atividades concluídas.
+    `Profile.trilhas_concluidas` não é alterado: o valor atual já foi contado
+    pelo endpoint antigo (`completar_trilha`).
+    """
+    Atividade = apps.get_model('trilhas', 'Atividade')
+    ProgressoAtividade = apps.get_model('trilhas', 'ProgressoAtividade')
+    MatriculaTrilha = apps.get_model('trilhas', 'MatriculaTrilha')
+
+    totals = dict(
+        Atividade.objects.order_by().values('module__trilha').annotate(total=Count('pk'))
+        .values_list('module__trilha', 'total')
+    )
+    rows = (
+        ProgressoAtividade.objects.filter(status='completed')
+        .order_by()
+        .values('user', 'activity__module__trilha')
+        .annotate(completed=Count('pk'), last_at=Max('completed_at'))
+        .values_list('user', 'activity__module__trilha', 'completed', 'last_at')
+    )
+
+    batch = []
+    for user_id, trilha_id, completed, last_at in rows.iterator(chunk_size=BATCH_SIZE):
+        total = totals.get(trilha_id, 0)
+        batch.append(MatriculaTrilha(
+            user_id=user_id,
+            trilha_id=trilha_id,
+            completed_count=completed,
+            total_count=total,
+            last_activity_at=last_at,
+            completed_at=last_at if total and completed >= total else None,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            MatriculaTrilha.objects.bulk_create(batch)
+            batch = []
+    MatriculaTrilha.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0006_matriculatrilha'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_enrollments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0007_backfill_enrollments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atividade',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='atividade',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:06
+
+from django.db import migrations
+
+from trilhas.content import render_activity
+
+BATCH_SIZE = 500
+
+
+def render_existing_content(apps, schema_editor):
+    Atividade = apps.get_model('trilhas', 'Atividade')
+    batch = []
+    for activity in Atividade.objects.only('id', 'content', 'content_hash').iterator(chunk_size=BATCH_SIZE):
+        if render_activity(activity):
+            batch.append(activity)
+        if len(batch) >= BATCH_SIZE:
+            Atividade.objects.bulk_update(batch, ['content_html', 'content_hash'])
+            batch = []
+    Atividade.objects.bulk_update(batch, ['content_html', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0008_atividade_content_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_existing_content, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0009_render_activity_content'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atividade',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='modulo',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='trilha',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='atividade',
+            name='duration',
+            field=models.CharField(blank=True, help_text='Duração estimada (ex: 10 min, 1h 30m, 05:30)', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='trilha',
+            name='duration',
+            field=models.CharField(default='0h 00m', help_text='Duração estimada total (ex: 2h 30m). Usada apenas enquanto as atividades não têm duração.', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='trilha',
+            index=models.Index(fields=['duration_seconds', 'id'], name='trilhas_duration_idx'),
+        ),
+    ]
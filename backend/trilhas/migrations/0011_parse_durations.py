@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:41
+
+from django.db import migrations
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from trilhas.durations import parse_duration, trilha_seconds
+
+BATCH_SIZE = 500
+
+
+def parse_existing_durations(apps, schema_editor):
+    """
+    Converte o texto das atividades e soma os totais de módulos e trilhas;
+    trilhas sem durações nas atividades usam o texto de `Trilha.duration`.
+    """
+    Atividade = apps.get_model('trilhas', 'Atividade')
+    Modulo = apps.get_model('trilhas', 'Modulo')
+    Trilha = apps.get_model('trilhas', 'Trilha')
+
+    batch = []
+    for activity in Atividade.objects.exclude(duration='').only('id', 'duration').iterator(chunk_size=BATCH_SIZE):
+        activity.duration_seconds = parse_duration(activity.duration) or 0
+        batch.append(activity)
+        if len(batch) >= BATCH_SIZE:
+            Atividade.objects.bulk_update(batch, ['duration_seconds'])
+            batch = []
+    Atividade.objects.bulk_update(batch, ['duration_seconds'])
+
+    module_totals = (
+        Atividade.objects.filter(module=OuterRef('pk')).order_by()
+        .values('module').annotate(total=Sum('duration_seconds')).values('total')
+    )
+    Modulo.objects.update(duration_seconds=Coalesce(Subquery(module_totals, output_field=IntegerField()), 0))
+    trilhas = [
+        Trilha(id=pk, duration_seconds=trilha_seconds(total, duration))
+        for pk, duration, total in (
+            Trilha.objects.order_by()
+            .annotate(total=Coalesce(Sum('modules__duration_seconds'), 0))
+            .values_list('id', 'duration', 'total')
+        )
+    ]
+    Trilha.objects.bulk_update(trilhas, ['duration_seconds'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0010_duration_seconds'),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_existing_durations, migrations.RunPython.noop),
+    ]
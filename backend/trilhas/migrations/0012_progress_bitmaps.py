@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0011_parse_durations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atividade',
+            name='progress_bit',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='matriculatrilha',
+            name='completed_bits',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.AddField(
+            model_name='trilha',
+            name='next_progress_bit',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
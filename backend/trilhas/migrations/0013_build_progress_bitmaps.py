@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:21
+
+from django.db import migrations
+
+from trilhas.bitmaps import set_bits
+
+BATCH_SIZE = 1000
+
+
+def build_bitmaps(apps, schema_editor):
+    """Numera as atividades de cada trilha na ordem do curso e monta os bitmaps das matrículas."""
+    Trilha = apps.get_model('trilhas', 'Trilha')
+    Atividade = apps.get_model('trilhas', 'Atividade')
+    ProgressoAtividade = apps.get_model('trilhas', 'ProgressoAtividade')
+    MatriculaTrilha = apps.get_model('trilhas', 'MatriculaTrilha')
+
+    next_bit = {}
+    batch = []
+    activities = Atividade.objects.order_by('module__trilha_id', 'module__order', 'order').values_list('id', 'module__trilha_id')
+    for pk, trilha_id in activities.iterator(chunk_size=BATCH_SIZE):
+        bit = next_bit.get(trilha_id, 0)
+        next_bit[trilha_id] = bit + 1
+        batch.append(Atividade(pk=pk, progress_bit=bit))
+        if len(batch) >= BATCH_SIZE:
+            Atividade.objects.bulk_update(batch, ['progress_bit'])
+            batch = []
+    Atividade.objects.bulk_update(batch, ['progress_bit'])
+    Trilha.objects.bulk_update(
+        [Trilha(pk=trilha_id, next_progress_bit=count) for trilha_id, count in next_bit.items()],
+        ['next_progress_bit'],
+        batch_size=BATCH_SIZE,
+    )
+
+    bits = {}
+    completed = (
+        ProgressoAtividade.objects.filter(status='completed')
+        .values_list('user_id', 'activity__module__trilha_id', 'activity__progress_bit')
+    )
+    for user_id, trilha_id, bit in completed.iterator(chunk_size=BATCH_SIZE):
+        bits.setdefault((user_id, trilha_id), []).append(bit)
+
+    batch = []
+    for enrollment in MatriculaTrilha.objects.only('id', 'user_id', 'trilha_id').iterator(chunk_size=BATCH_SIZE):
+        enrollment.completed_bits = set_bits(b'', bits.get((enrollment.user_id, enrollment.trilha_id), []))
+        batch.append(enrollment)
+        if len(batch) >= BATCH_SIZE:
+            MatriculaTrilha.objects.bulk_update(batch, ['completed_bits'])
+            batch = []
+    MatriculaTrilha.objects.bulk_update(batch, ['completed_bits'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trilhas', '0012_progress_bitmaps'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_bitmaps, migrations.RunPython.noop),
+    ]
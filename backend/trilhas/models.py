@@ -30,6 +30,9 @@ class Trilha(models.Model):
         null=True,
         help_text="Imagem de capa do card (proporção ideal 16:9)"
     )
+    # Derivados da capa (larguras fixas em WebP/JPEG + placeholder desfocado).
+    # Preenchido em segundo plano por trilhas/images.py.
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.SET_NULL, 
@@ -40,14 +43,24 @@ class Trilha(models.Model):
     duration = models.CharField(
         max_length=20, 
         default="0h 00m",
-        help_text="Duração estimada total (ex: 2h 30m)"
+        help_text="Duração estimada total (ex: 2h 30m). Usada apenas enquanto as atividades não têm duração."
     )
+    # Soma das durações das atividades, mantida por trilhas/durations.py
+    duration_seconds = models.PositiveIntegerField(default=0, editable=False)
+    # Próximo bit livre para `Atividade.progress_bit` (nunca reutilizado)
+    next_progress_bit = models.PositiveIntegerField(default=0, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['title']
+        indexes = [
+            # Abas da Home: filtro por categoria já na ordem da listagem
+            models.Index(fields=['category', 'title'], name='trilhas_category_title_idx'),
+            # ?max_duration= e ?ordering=duration na listagem
+            models.Index(fields=['duration_seconds', 'id'], name='trilhas_duration_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -58,6 +71,7 @@ class Modulo(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, help_text="Breve descrição do que será aprendido neste módulo.")
     order = models.PositiveIntegerField(help_text='Posição sequencial dentro da trilha (1, 2, 3...).')
+    duration_seconds = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['order']
@@ -81,11 +95,17 @@ class Atividade(models.Model):
     
     description = models.TextField(blank=True, help_text="Descrição curta para listagem")
     content = models.TextField(blank=True, help_text="Conteúdo em texto ou Markdown")
+    # HTML sanitizado e hash do conteúdo, gerados ao salvar (trilhas/content.py)
+    content_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=32, blank=True, editable=False)
     video_url = models.URLField(blank=True, null=True, help_text="Link do Youtube/Vimeo (se for vídeo)")
     
-    duration = models.CharField(max_length=20, blank=True, help_text="Duração estimada (ex: 10 min)")
+    duration = models.CharField(max_length=20, blank=True, help_text="Duração estimada (ex: 10 min, 1h 30m, 05:30)")
+    duration_seconds = models.PositiveIntegerField(default=0, editable=False)
     order = models.PositiveIntegerField(help_text='Posição sequencial dentro do módulo.')
     xp_reward = models.PositiveIntegerField(default=10, help_text='XP concedido ao concluir a atividade.')
+    # Posição fixa da atividade no bitmap de progresso da trilha (trilhas/bitmaps.py)
+    progress_bit = models.PositiveIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['order']
@@ -114,4 +134,45 @@ class ProgressoAtividade(models.Model):
         self.save(update_fields=['status', 'completed_at'])
 
     def __str__(self) -> str:
-        return f"{self.user} - {self.activity} ({self.status})"
\ No newline at end of file
+        return f"{self.user} - {self.activity} ({self.status})"
+
+class MatriculaTrilha(models.Model):
+    """
+    Progresso desnormalizado de um usuário em uma trilha.
+    Atualizado incrementalmente em trilhas/progress.py, na mesma transação
+    da conclusão das atividades: o painel "minhas trilhas" é uma única query.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='trilha_enrollments', on_delete=models.CASCADE)
+    trilha = models.ForeignKey(Trilha, related_name='enrollments', on_delete=models.CASCADE)
+    completed_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    last_activity = models.ForeignKey(
+        Atividade,
+        related_name='+',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    # Bitmap das atividades concluídas (bit = Atividade.progress_bit); cópia de ProgressoAtividade
+    completed_bits = models.BinaryField(default=b'', editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'trilha'], name='trilhas_enrollment_user_trilha_uniq'),
+        ]
+        indexes = [
+            # Painel "minhas trilhas": mais recentes primeiro
+            models.Index(fields=['user', '-last_activity_at'], name='trilhas_enrollment_recent_idx'),
+        ]
+
+    @property
+    def percent(self) -> int:
+        if not self.total_count:
+            return 0
+        return min(100, self.completed_count * 100 // self.total_count)
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.trilha} ({self.completed_count}/{self.total_count})"
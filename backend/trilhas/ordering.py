@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from trilhas.cache import touch_trilha
+from trilhas.models import Atividade, Modulo
+
+"""Reordenação em lote de módulos (na trilha) e atividades (no módulo).
+
+`order` só é comparado (progressão, ordenação), nunca tratado como denso.
+Por isso a nova ordem é gravada com um único UPDATE ... CASE em uma faixa
+que não colide com nenhum valor atual: 1..n se todos os valores atuais forem
+maiores que n, senão max+1..max+n. A faixa alterna entre as duas a cada
+reordenação, então os números continuam pequenos e a restrição
+(pai, order) nunca é violada no meio do statement.
+"""
+
+
+class ReorderError(Exception):
+    """Lista enviada não corresponde aos filhos atuais; a mensagem vai para a API."""
+
+
+def _reorder(model, parent_field, parent_id, ordered_ids):
+    ordered_ids = list(ordered_ids)
+    with transaction.atomic():
+        # Trava os filhos: duas reordenações simultâneas do mesmo pai são serializadas
+        rows = dict(model.objects.select_for_update().filter(**{parent_field: parent_id}).values_list('id', 'order'))
+        current = set(rows)
+        if len(ordered_ids) != len(set(ordered_ids)):
+            raise ReorderError('A lista contém ids repetidos.')
+        if set(ordered_ids) != current:
+            missing = sorted(current - set(ordered_ids))
+            unknown = sorted(set(ordered_ids) - current)
+            raise ReorderError(f'A lista deve conter todos os itens, e só eles (faltando: {missing}, desconhecidos: {unknown}).')
+        if not ordered_ids:
+            return {}
+
+        size = len(ordered_ids)
+        start = 1 if min(rows.values()) > size else max(rows.values()) + 1
+        new_order = {pk: start + index for index, pk in enumerate(ordered_ids)}
+        model.objects.filter(pk__in=current).update(order=Case(
+            *(When(pk=pk, then=Value(order)) for pk, order in new_order.items()),
+            output_field=IntegerField(),
+        ))
+    return new_order
+
+
+def reorder_modules(trilha_id, module_ids):
+    """Reordena os módulos da trilha na ordem dos ids. Retorna {id: order}."""
+    new_order = _reorder(Modulo, 'trilha_id', trilha_id, module_ids)
+    touch_trilha(trilha_id=trilha_id)
+    return new_order
+
+
+def reorder_activities(module_id, activity_ids):
+    """Reordena as atividades do módulo na ordem dos ids. Retorna {id: order}."""
+    new_order = _reorder(Atividade, 'module_id', module_id, activity_ids)
+    touch_trilha(module_id=module_id)
+    return new_order
+
+
+def move_to_edge(model, parent_field, queryset, front=True):
+    """
+    Move os itens do queryset para o início (ou fim) de cada pai, mantendo a
+    ordem relativa entre eles. Uma reordenação por pai (ação do admin).
+    """
+    selected = {}
+    for pk, parent_id in queryset.order_by('order').values_list('id', parent_field):
+        selected.setdefault(parent_id, []).append(pk)
+
+    reorder = reorder_modules if model is Modulo else reorder_activities
+    for parent_id, ids in selected.items():
+        rest = list(
+            model.objects.filter(**{parent_field: parent_id}).exclude(pk__in=ids)
+            .order_by('order').values_list('id', flat=True)
+        )
+        reorder(parent_id, ids + rest if front else rest + ids)
+    return sum(len(ids) for ids in selected.values())
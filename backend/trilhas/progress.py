@@ -0,0 +1,176 @@
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+
+from trilhas.bitmaps import set_bits
+from trilhas.models import Atividade, MatriculaTrilha, Modulo, ProgressoAtividade
+from user.models import Profile, XPEntry
+from user.xp import award_xp
+
+"""Conclusão de atividades (individual ou em lote).
+
+A trava de progressão (só conclui uma atividade depois das anteriores do
+mesmo módulo) é verificada com uma única query agregada para todo o lote,
+e o XP é registrado no livro-razão e somado ao perfil com um único UPDATE.
+Na mesma transação os contadores de `MatriculaTrilha` são atualizados e,
+ao concluir a última atividade de uma trilha, `Profile.trilhas_concluidas`.
+"""
+
+MAX_BATCH_SIZE = 200
+
+
+class ProgressionError(Exception):
+    """Erro de regra de progressão; a mensagem vai direto para a API."""
+
+
+def _check_progression(user, activities, requested_ids):
+    """
+    Garante que todas as atividades anteriores às solicitadas já estão concluídas
+    (ou fazem parte do mesmo lote). Retorna o conjunto de ids já concluídos.
+    """
+    max_order = {}
+    for activity in activities:
+        max_order[activity.module_id] = max(max_order.get(activity.module_id, 0), activity.order)
+
+    rows = (
+        Atividade.objects.filter(module_id__in=max_order, order__lte=max(max_order.values()))
+        .annotate(done=Exists(ProgressoAtividade.objects.filter(
+            user=user,
+            activity=OuterRef('pk'),
+            status=ProgressoAtividade.Status.COMPLETED,
+        )))
+        .values_list('id', 'module_id', 'order', 'title', 'done')
+    )
+
+    by_module = {}
+    for row in rows:
+        by_module.setdefault(row[1], []).append(row)
+
+    for activity in sorted(activities, key=lambda a: (a.module_id, a.order)):
+        missing = [
+            row for row in by_module.get(activity.module_id, [])
+            if row[2] < activity.order and not row[4] and row[0] not in requested_ids
+        ]
+        if missing:
+            title = max(missing, key=lambda row: row[2])[3]
+            raise ProgressionError(f'Você deve primeiro completar a atividade anterior: "{title}".')
+
+    return {row[0] for module_rows in by_module.values() for row in module_rows if row[4]}
+
+
+def _update_enrollments(user, activities, now):
+    """
+    Soma as atividades recém-concluídas às matrículas do usuário (criando-as
+    se preciso). Retorna quantas trilhas foram concluídas agora.
+    Chamado com o perfil travado: leitura e escrita não disputam com outra conclusão.
+    """
+    by_trilha = {}
+    for activity in sorted(activities, key=lambda a: (a.module_id, a.order)):
+        by_trilha.setdefault(activity.trilha_id, []).append(activity)
+
+    totals = dict(
+        Atividade.objects.filter(module__trilha_id__in=by_trilha)
+        .order_by()
+        .values('module__trilha_id')
+        .annotate(total=Count('id'))
+        .values_list('module__trilha_id', 'total')
+    )
+    enrollments = {
+        enrollment.trilha_id: enrollment
+        for enrollment in MatriculaTrilha.objects.filter(user=user, trilha_id__in=by_trilha)
+    }
+
+    to_create, to_update, finished = [], [], 0
+    for trilha_id, done in by_trilha.items():
+        enrollment = enrollments.get(trilha_id)
+        if enrollment is None:
+            enrollment = MatriculaTrilha(user=user, trilha_id=trilha_id)
+            to_create.append(enrollment)
+        else:
+            to_update.append(enrollment)
+        enrollment.completed_count += len(done)
+        enrollment.completed_bits = set_bits(enrollment.completed_bits, [a.progress_bit for a in done])
+        enrollment.total_count = totals.get(trilha_id, 0)
+        enrollment.last_activity = done[-1]
+        enrollment.last_activity_at = now
+        if enrollment.completed_at is None and enrollment.completed_count >= enrollment.total_count:
+            enrollment.completed_at = now
+            finished += 1
+
+    MatriculaTrilha.objects.bulk_create(to_create)
+    MatriculaTrilha.objects.bulk_update(to_update, [
+        'completed_count', 'completed_bits', 'total_count', 'last_activity', 'last_activity_at', 'completed_at',
+    ])
+    return finished
+
+
+def complete_activities(user, activity_ids):
+    """
+    Conclui as atividades informadas em uma única transação.
+    Retorna {'completed': [...], 'already_completed': [...], 'xp_awarded': int,
+    'trilhas_completed': int}.
+    Lança ProgressionError se alguma atividade estiver travada ou não existir.
+    """
+    requested_ids = set(activity_ids)
+    with transaction.atomic():
+        # Trava o perfil: conclusões simultâneas do mesmo usuário são serializadas
+        Profile.objects.select_for_update().filter(user=user).exists()
+
+        activities = list(
+            Atividade.objects.filter(pk__in=requested_ids)
+            .only('id', 'module_id', 'order', 'xp_reward', 'title', 'progress_bit')
+            .annotate(trilha_id=F('module__trilha_id'))
+        )
+        if len(activities) != len(requested_ids):
+            missing = sorted(requested_ids - {a.id for a in activities})
+            raise ProgressionError(f'Atividade(s) não encontrada(s): {missing}.')
+
+        completed_before = _check_progression(user, activities, requested_ids)
+        new = [a for a in activities if a.id not in completed_before]
+        trilhas_completed = 0
+
+        if new:
+            now = timezone.now()
+            ProgressoAtividade.objects.bulk_create(
+                [
+                    ProgressoAtividade(
+                        user=user,
+                        activity=activity,
+                        status=ProgressoAtividade.Status.COMPLETED,
+                        completed_at=now,
+                    )
+                    for activity in new
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'activity'],
+                update_fields=['status', 'completed_at'],
+            )
+            trilhas_completed = _update_enrollments(user, new, now)
+            if trilhas_completed:
+                Profile.objects.filter(user=user).update(
+                    trilhas_concluidas=F('trilhas_concluidas') + trilhas_completed,
+                )
+
+        # Uma linha no livro-razão por atividade e um único UPDATE no perfil
+        xp_awarded = award_xp(user, [
+            (XPEntry.Source.ACTIVITY, activity.xp_reward, activity.id) for activity in new
+        ])
+
+    return {
+        'completed': sorted(a.id for a in new),
+        'already_completed': sorted(requested_ids & completed_before),
+        'xp_awarded': xp_awarded,
+        'trilhas_completed': trilhas_completed,
+    }
+
+
+def refresh_enrollment_totals(module_id):
+    """
+    Recalcula `total_count` das matrículas da trilha do módulo (nova atividade
+    ou atividade removida). Trilhas já concluídas continuam concluídas.
+    """
+    trilha_id = Modulo.objects.filter(pk=module_id).values_list('trilha_id', flat=True).first()
+    if trilha_id is None:
+        return
+    total = Atividade.objects.filter(module__trilha_id=trilha_id).count()
+    MatriculaTrilha.objects.filter(trilha_id=trilha_id).update(total_count=total)
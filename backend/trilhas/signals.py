@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from trilhas.bitmaps import assign_bit, assign_missing_bits
+from trilhas.cache import touch_trilha
+from trilhas.content import render_activity
+from trilhas.durations import apply_delta, parse_duration, refresh_trilha_totals, trilha_seconds
+from trilhas.images import clear_stale_variants, needs_variants, schedule_variants
+from trilhas.models import Atividade, Modulo, Trilha
+from trilhas.progress import refresh_enrollment_totals
+
+
+@receiver(post_save, sender=Trilha)
+def generate_cover_variants(sender, instance, **kwargs):
+    """Agenda os derivados da capa quando ela muda (após o commit da transação)."""
+    if needs_variants(instance):
+        transaction.on_commit(lambda: schedule_variants(instance))
+
+
+@receiver(pre_save, sender=Trilha)
+def clear_cover_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not clear_stale_variants(instance):
+        return
+    if update_fields is not None and 'image_variants' not in update_fields:
+        Trilha.objects.filter(pk=instance.pk).update(image_variants={})
+
+
+@receiver(pre_save, sender=Trilha)
+def refresh_trilha_duration(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mantém `duration_seconds` coerente com o texto declarado (usado enquanto as atividades não têm duração)."""
+    if raw or update_fields is not None:
+        return
+    total = 0
+    if not instance._state.adding:
+        total = Modulo.objects.filter(trilha_id=instance.pk).aggregate(total=Sum('duration_seconds'))['total'] or 0
+    instance.duration_seconds = trilha_seconds(total, instance.duration)
+
+
+@receiver(post_save, sender=Trilha)
+def refresh_trilha_duration_on_partial_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # save(update_fields=[...]) não grava o valor calculado no pre_save
+    if not raw and update_fields is not None and 'duration' in update_fields:
+        refresh_trilha_totals([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Modulo)
+def invalidate_curriculum_on_module_change(sender, instance, **kwargs):
+    touch_trilha(trilha_id=instance.trilha_id)
+
+
+@receiver(pre_save, sender=Atividade)
+def render_activity_content(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Renderiza o Markdown uma vez, ao salvar (não a cada request)."""
+    if raw or (update_fields is not None and 'content' not in update_fields):
+        return
+    render_activity(instance)
+
+
+@receiver(pre_save, sender=Atividade)
+def assign_activity_progress_bit(sender, instance, raw=False, **kwargs):
+    if not raw and instance.progress_bit is None:
+        assign_bit(instance)
+
+
+@receiver(pre_save, sender=Atividade)
+def parse_activity_duration(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Converte o texto em segundos e guarda o valor anterior para o delta do post_save."""
+    if raw or (update_fields is not None and not {'duration', 'module'} & set(update_fields)):
+        return
+    instance.duration_seconds = parse_duration(instance.duration) or 0
+    previous = None
+    if not instance._state.adding:
+        previous = Atividade.objects.filter(pk=instance.pk).values_list('module_id', 'duration_seconds').first()
+    instance._duration_previous = previous or (None, 0)
+
+
+@receiver(post_save, sender=Atividade)
+def update_duration_totals_on_save(sender, instance, **kwargs):
+    previous = instance.__dict__.pop('_duration_previous', None)
+    if previous is None:
+        return
+    old_module_id, old_seconds = previous
+    if old_module_id == instance.module_id:
+        apply_delta(instance.module_id, instance.duration_seconds - old_seconds)
+    else:
+        apply_delta(old_module_id, -old_seconds)
+        apply_delta(instance.module_id, instance.duration_seconds)
+        if old_module_id is not None:
+            # Atividade movida de módulo: a árvore em cache da trilha de origem também muda
+            touch_trilha(module_id=old_module_id)
+
+
+@receiver(post_delete, sender=Atividade)
+def update_duration_totals_on_delete(sender, instance, **kwargs):
+    apply_delta(instance.module_id, -instance.duration_seconds)
+
+
+@receiver(pre_save, sender=Modulo)
+def remember_module_trilha(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_trilha_id = Modulo.objects.filter(pk=instance.pk).values_list('trilha_id', flat=True).first()
+
+
+@receiver(post_save, sender=Modulo)
+def move_module_duration(sender, instance, **kwargs):
+    """Módulo movido para outra trilha: transfere a duração e os bits de progresso."""
+    previous = instance.__dict__.pop('_previous_trilha_id', None)
+    if previous is None or previous == instance.trilha_id:
+        return
+    # A trilha de destino é invalidada em invalidate_curriculum_on_module_change
+    touch_trilha(trilha_id=previous)
+    refresh_trilha_totals([previous, instance.trilha_id])
+    # Os bits de progresso são por trilha: as atividades recebem bits novos na trilha de destino
+    assign_missing_bits(module_ids=[instance.pk], force=True)
+
+
+@receiver([post_save, post_delete], sender=Atividade)
+def invalidate_curriculum_on_activity_change(sender, instance, **kwargs):
+    touch_trilha(module_id=instance.module_id)
+
+
+@receiver(post_save, sender=Atividade)
+def refresh_totals_on_activity_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        refresh_enrollment_totals(instance.module_id)
+
+
+@receiver(post_delete, sender=Atividade)
+def refresh_totals_on_activity_deleted(sender, instance, **kwargs):
+    refresh_enrollment_totals(instance.module_id)
@@ -0,0 +1,354 @@
+import io
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from trilhas import bitmaps, catalog, progress
+from trilhas.content import render_markdown
+from trilhas.durations import parse_duration
+from trilhas.models import Atividade, MatriculaTrilha, Modulo, ProgressoAtividade, Trilha
+from user.models import CustomUser, Profile
+
+
+def create_trilha(slug, modules=1, activities=2, **kwargs):
+    """Trilha com `modules` módulos de `activities` atividades cada."""
+    trilha = Trilha.objects.create(title=kwargs.pop('title', slug.title()), slug=slug, **kwargs)
+    for module_order in range(1, modules + 1):
+        module = Modulo.objects.create(trilha=trilha, title=f'Módulo {module_order}', order=module_order)
+        for order in range(1, activities + 1):
+            Atividade.objects.create(module=module, title=f'Atividade {module_order}.{order}', order=order)
+    return trilha
+
+
+def activity_ids(trilha):
+    return list(
+        Atividade.objects.filter(module__trilha=trilha)
+        .order_by('module__order', 'order')
+        .values_list('id', flat=True)
+    )
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TRILHA_COVER_WORKERS=0)
+class CoverVariantsTests(TestCase):
+    def _png(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 450), 'teal').save(buffer, 'PNG')
+        return SimpleUploadedFile('capa.png', buffer.getvalue(), content_type='image/png')
+
+    def test_variants_follow_the_cover(self):
+        trilha = Trilha.objects.create(title='Python', slug='python')
+        with self.captureOnCommitCallbacks(execute=True):
+            trilha.image = self._png()
+            trilha.save()
+
+        trilha.refresh_from_db()
+        self.assertEqual(trilha.image_variants['source'], trilha.image.name)
+        self.assertEqual(set(trilha.image_variants['webp']), {'320', '640'})
+        self.assertTrue(trilha.image_variants['placeholder'].startswith('data:image/webp;base64,'))
+
+        trilha.image = None
+        trilha.save()
+        trilha.refresh_from_db()
+        self.assertEqual(trilha.image_variants, {})
+
+
+class CatalogListingTests(TestCase):
+    def setUp(self):
+        create_trilha('python', modules=2, activities=3, category='Back-end')
+        create_trilha('css', modules=1, activities=1, category='Front-end')
+
+    def test_counters_are_annotated(self):
+        response = APIClient().get('/api/v1/trilhas/', {'category': 'back-end'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['slug'] for t in response.data], ['python'])
+        self.assertEqual(response.data[0]['modules_count'], 2)
+        self.assertEqual(response.data[0]['activities_count'], 6)
+        self.assertEqual(response.data[0]['total_xp'], 60)
+
+
+class StudentTestCase(TestCase):
+    """Aluno autenticado e uma trilha com 2 módulos de 2 atividades."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='aluno@costanza.dev')
+        self.trilha = create_trilha('python', modules=2, activities=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class CurriculumTests(StudentTestCase):
+    def test_detail_reflects_changes_after_caching(self):
+        self.client.get(f'/api/v1/trilhas/{self.trilha.pk}/')
+        module = self.trilha.modules.get(order=1)
+        Atividade.objects.create(module=module, title='Nova', order=3)
+
+        response = self.client.get(f'/api/v1/trilhas/{self.trilha.pk}/')
+
+        self.assertEqual(len(response.data['modules'][0]['activities']), 3)
+
+    def test_moving_an_activity_invalidates_both_trilhas(self):
+        other = create_trilha('rust', modules=1, activities=1)
+        self.client.get(f'/api/v1/trilhas/{self.trilha.pk}/')
+        activity = Atividade.objects.get(module__trilha=self.trilha, module__order=1, order=1)
+
+        activity.module = other.modules.get()
+        activity.order = 2
+        activity.save()
+
+        response = self.client.get(f'/api/v1/trilhas/{self.trilha.pk}/')
+        self.assertNotIn(activity.id, [a['id'] for a in response.data['modules'][0]['activities']])
+
+
+class ProgressionTests(StudentTestCase):
+    def test_progression_lock_and_batch_completion(self):
+        first, second, third, _ = activity_ids(self.trilha)
+
+        response = self.client.post(f'/api/v1/trilhas/atividades/{second}/complete/')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/v1/trilhas/atividades/complete_batch/', {'activities': [first, second, third]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['completed'], sorted([first, second, third]))
+        self.assertEqual(response.data['xp_awarded'], 30)
+
+        detail = self.client.get(f'/api/v1/trilhas/{self.trilha.pk}/').data
+        self.assertEqual(detail['progress']['completed'], 3)
+        self.assertEqual(detail['progress']['next_activity_id'], activity_ids(self.trilha)[3])
+
+
+class EnrollmentTests(StudentTestCase):
+    def test_enrollment_counters(self):
+        progress.complete_activities(self.user, activity_ids(self.trilha))
+
+        response = self.client.get('/api/v1/trilhas/minhas/', {'status': 'concluidas'})
+
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['completed_count'], 4)
+        self.assertEqual(response.data[0]['percent'], 100)
+        self.assertEqual(Profile.objects.get(user=self.user).trilhas_concluidas, 1)
+
+
+class ActivityContentTests(TestCase):
+    def setUp(self):
+        trilha = create_trilha('python', activities=1)
+        self.activity = Atividade.objects.get(module__trilha=trilha)
+        self.activity.content = '# Título\n\n<script>alert(1)</script>[link](javascript:alert(1)) **ok**'
+        self.activity.save()
+
+    def test_markdown_is_sanitized(self):
+        html = render_markdown('<img src=x onerror="alert(1)"> <b onclick="x()">a</b>')
+
+        self.assertNotIn('onerror', html)
+        self.assertNotIn('onclick', html)
+        self.assertIn('<h1>Título</h1>', self.activity.content_html)
+        self.assertNotIn('<script', self.activity.content_html)
+        self.assertNotIn('javascript:', self.activity.content_html)
+
+    def test_versioned_url_is_immutable_and_etag_revalidates(self):
+        url = f'/api/v1/trilhas/atividades/{self.activity.pk}/content/'
+        client = APIClient()
+
+        versioned = client.get(url, {'v': self.activity.content_hash})
+        self.assertEqual(versioned.status_code, 200)
+        self.assertIn('immutable', versioned['Cache-Control'])
+        self.assertIn('<strong>ok</strong>', versioned.data['html'])
+
+        unversioned = client.get(url)
+        self.assertIn('no-cache', unversioned['Cache-Control'])
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=unversioned['ETag']).status_code, 304)
+
+        self.activity.content = 'novo'
+        self.activity.save()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=unversioned['ETag']).status_code, 200)
+
+    def test_invalid_id_is_not_found(self):
+        self.assertEqual(APIClient().get('/api/v1/trilhas/atividades/abc/content/').status_code, 404)
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(email='autora@costanza.dev')
+        self.tree = [{
+            'slug': 'python',
+            'title': 'Python',
+            'category': 'Back-end',
+            'duration': '2h',
+            'author': 'autora@costanza.dev',
+            'modules': [{
+                'order': 1,
+                'title': 'Básico',
+                'activities': [
+                    {'order': 1, 'title': 'Variáveis', 'content': '**x**', 'duration': '10 min', 'xp_reward': 5},
+                    {'order': 2, 'title': 'Funções', 'type': 'video'},
+                ],
+            }],
+        }]
+
+    def test_validation_reports_every_row(self):
+        bad = [
+            {'slug': 'não é slug', 'title': 'x', 'duration': 'x' * 30, 'modules': [
+                'módulo',
+                {'order': 1, 'title': 'm', 'activities': [
+                    {'order': 1, 'title': 'a', 'xp_reward': '10', 'type': 'podcast'},
+                    {'order': 1, 'title': 'b'},
+                ]},
+            ]},
+            {'title': 'sem slug'},
+        ]
+
+        with self.assertRaises(catalog.CatalogError) as raised:
+            catalog.validate(bad)
+
+        errors = '\n'.join(raised.exception.errors)
+        for expected in ('"slug" deve ter apenas', '"duration" excede 20', 'deve ser um objeto',
+                         '"xp_reward" deve ser um inteiro', 'tipo inválido "podcast"', '"order" 1 repetido',
+                         '"slug" é obrigatório'):
+            self.assertIn(expected, errors)
+
+    def test_round_trip_is_idempotent(self):
+        catalog.validate(self.tree)
+        catalog.import_catalog(self.tree)
+        exported = catalog.export_catalog()
+        result = catalog.import_catalog(exported)
+
+        self.assertEqual(result['activities'], 2)
+        self.assertEqual(Atividade.objects.count(), 2)
+        self.assertEqual(catalog.export_catalog(), exported)
+        trilha = Trilha.objects.get(slug='python')
+        self.assertEqual(trilha.author, self.author)
+        self.assertEqual(trilha.duration_seconds, 600)
+        self.assertIn('<strong>x</strong>', Atividade.objects.get(order=1).content_html)
+
+    def test_omitted_fields_are_kept(self):
+        catalog.import_catalog(self.tree)
+        partial = [{'slug': 'python', 'title': 'Python 3', 'modules': [
+            {'order': 1, 'title': 'Básico', 'activities': [{'order': 1, 'title': 'Variáveis'}]},
+        ]}]
+
+        catalog.validate(partial)
+        catalog.import_catalog(partial, prune=True)
+
+        trilha = Trilha.objects.get(slug='python')
+        activity = Atividade.objects.get(module__trilha=trilha)
+        self.assertEqual((trilha.title, trilha.author, trilha.category), ('Python 3', self.author, 'Back-end'))
+        self.assertEqual((activity.xp_reward, activity.content), (5, '**x**'))
+
+    def test_unknown_author_is_reported_and_kept(self):
+        catalog.import_catalog(self.tree)
+        self.tree[0]['author'] = 'autroa@costanza.dev'
+
+        with self.assertRaises(catalog.CatalogError) as raised:
+            catalog.validate(self.tree)
+        self.assertIn('autor "autroa@costanza.dev" não encontrado', str(raised.exception))
+        with self.assertRaises(catalog.CatalogError):
+            catalog.import_catalog(self.tree)
+        self.assertEqual(Trilha.objects.get(slug='python').author, self.author)
+
+    def test_malformed_file_is_a_command_error(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml', encoding='utf-8') as stream:
+            stream.write('trilhas:\n  - slug: python\n    title: [sem fechar\n')
+            stream.flush()
+            with self.assertRaisesMessage(CommandError, 'Arquivo inválido'):
+                call_command('import_trilhas', stream.name, dry_run=True)
+
+
+class DurationTests(TestCase):
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration('1h 30m'), 5400)
+        self.assertEqual(parse_duration('10 min'), 600)
+        self.assertEqual(parse_duration('05:30'), 330)
+        self.assertEqual(parse_duration('1:00:00'), 3600)
+        self.assertIsNone(parse_duration('uma tarde'))
+
+    def test_totals_follow_activities_and_fall_back_to_declared_text(self):
+        declared = Trilha.objects.create(title='Declarada', slug='declarada', duration='40h 30m')
+        measured = create_trilha('medida', activities=2, duration='99h 00m')
+        for activity in Atividade.objects.filter(module__trilha=measured):
+            activity.duration = '45 min'
+            activity.save()
+
+        declared.refresh_from_db()
+        measured.refresh_from_db()
+        self.assertEqual(declared.duration_seconds, 40 * 3600 + 30 * 60)
+        self.assertEqual(measured.duration_seconds, 90 * 60)
+
+        Atividade.objects.filter(module__trilha=measured).delete()
+        measured.refresh_from_db()
+        self.assertEqual(measured.duration_seconds, 99 * 3600)
+
+    def test_max_duration_filter_and_ordering(self):
+        Trilha.objects.create(title='Longa', slug='longa', duration='40h 30m')
+        Trilha.objects.create(title='Curta', slug='curta', duration='30m')
+        client = APIClient()
+
+        response = client.get('/api/v1/trilhas/', {'max_duration': '3600'})
+        self.assertEqual([t['slug'] for t in response.data], ['curta'])
+        response = client.get('/api/v1/trilhas/', {'max_duration': '41h'})
+        self.assertEqual(len(response.data), 2)
+
+        response = client.get('/api/v1/trilhas/', {'ordering': '-duration'})
+        self.assertEqual([t['slug'] for t in response.data], ['longa', 'curta'])
+
+        for value in ('²', 'muito'):
+            self.assertEqual(client.get('/api/v1/trilhas/', {'max_duration': value}).status_code, 400)
+        self.assertEqual(client.get('/api/v1/trilhas/', {'ordering': 'xp'}).status_code, 400)
+
+
+class ReorderTests(StudentTestCase):
+    def test_reorder_modules_is_staff_only(self):
+        first, second = self.trilha.modules.order_by('order').values_list('id', flat=True)
+        url = f'/api/v1/trilhas/{self.trilha.pk}/reorder_modules/'
+
+        self.assertEqual(self.client.post(url, {'order': [second, first]}, format='json').status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post(url, {'order': [second, first]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.trilha.modules.order_by('order').values_list('id', flat=True)), [second, first])
+        self.assertEqual(self.client.post(url, {'order': [first]}, format='json').status_code, 400)
+
+
+class ProgressBitmapTests(TestCase):
+    FIELDS = ('completed_bits', 'completed_count', 'total_count', 'last_activity_id', 'last_activity_at', 'completed_at')
+
+    def test_rebuild_matches_incremental_updates(self):
+        users = [CustomUser.objects.create_user(email=f'aluno{i}@costanza.dev') for i in range(2)]
+        trilha = create_trilha('python', modules=2, activities=3)
+        ids = activity_ids(trilha)
+        progress.complete_activities(users[0], ids[:2])
+        progress.complete_activities(users[0], ids[2:4])
+        progress.complete_activities(users[1], ids)
+
+        def snapshot():
+            return list(MatriculaTrilha.objects.order_by('user_id').values(*self.FIELDS))
+
+        incremental = snapshot()
+        MatriculaTrilha.objects.all().delete()
+        bitmaps.rebuild()
+        self.assertEqual(snapshot(), incremental)
+
+        # Progresso removido: a matrícula volta a zero, sem última atividade
+        ProgressoAtividade.objects.filter(user=users[0]).delete()
+        bitmaps.rebuild()
+        reset = MatriculaTrilha.objects.get(user=users[0])
+        self.assertEqual((bytes(reset.completed_bits), reset.completed_count, reset.last_activity_id), (b'', 0, None))
+        self.assertEqual(snapshot()[1], incremental[1])
+
+    def test_detail_status_comes_from_the_bitmap(self):
+        user = CustomUser.objects.create_user(email='aluno@costanza.dev')
+        trilha = create_trilha('python', activities=2)
+        progress.complete_activities(user, activity_ids(trilha)[:1])
+        client = APIClient()
+        client.force_authenticate(user)
+
+        activities = client.get(f'/api/v1/trilhas/{trilha.pk}/').data['modules'][0]['activities']
+
+        self.assertEqual([a['status'] for a in activities], ['completed', 'pending'])
+        self.assertNotIn('completed_at', activities[0])
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Profile
+from .models import CustomUser, Profile, XPEntry
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -14,4 +14,12 @@ class ProfileAdmin(admin.ModelAdmin):
     readonly_fields = ('xp', 'exercicios_concluidos', 'trilhas_concluidas', 'dias_conectados')
 
 
+@admin.register(XPEntry)
+class XPEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'source', 'amount', 'reference_id', 'created_at')
+    list_filter = ('source',)
+    search_fields = ('user__email', 'user__username')
+    readonly_fields = ('user', 'source', 'amount', 'reference_id', 'created_at')
+
+
 admin.site.register(CustomUser, CustomUserAdmin)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter # <-- Importamos o router
-from .viewsets import RegisterView, UserViewSet, ProfileViewSet
+from .viewsets import RegisterView, UserViewSet, ProfileViewSet, LeaderboardViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 # 1. Criamos a instância do router
@@ -11,6 +11,8 @@ router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user-management')
 # Cria todas as URLs para o ProfileViewSet sob o prefixo 'profile'
 router.register(r'profile', ProfileViewSet, basename='profile')
+# Rankings (geral/semanal, global e entre amigos)
+router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
 
 # 3. Adicionamos as URLs do router às nossas urlpatterns
 urlpatterns = [
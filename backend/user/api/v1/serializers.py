@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from user.models import CustomUser, Profile
+from user.models import CustomUser, LeaderboardEntry, Profile
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,18 +15,23 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         )
         return user
 
-class UserSerializer(serializers.ModelSerializer):
-    nome = serializers.SerializerMethodField()
-    arroba = serializers.SerializerMethodField()
-
-    def get_nome(self, obj):
-        return obj.profile.nome if hasattr(obj, 'profile') else None
-
-    def get_arroba(self, obj):
-        return obj.profile.arroba if hasattr(obj, 'profile') else None
+class UserSummarySerializer(serializers.ModelSerializer):
+    """
+    Representação compacta de usuário usada em todas as APIs (usuários,
+    amigos, eventos). Os campos do perfil vêm de `profile`: alimente com
+    querysets com select_related('profile') (ou '<fk>__profile') para não
+    gerar uma query por linha.
+    """
+    nome = serializers.CharField(source='profile.nome', read_only=True, default=None)
+    arroba = serializers.CharField(source='profile.arroba', read_only=True, default=None)
 
     class Meta:
         model = CustomUser
+        fields = ('id', 'username', 'email', 'nome', 'arroba')
+
+
+class UserSerializer(UserSummarySerializer):
+    class Meta(UserSummarySerializer.Meta):
         # Campos que queremos exibir na API
         fields = ('id', 'username', 'email', 'date_joined', 'nome', 'arroba')
 
@@ -43,3 +48,13 @@ class ProfileSerializer(serializers.ModelSerializer):
             'nome': {'required': False}, # Nome pode ser opcional na atualização parcial? Melhor deixar required se for vazio. Mas allow_blank=False por padrão.
             'arroba': {'required': False}
         } 
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField(read_only=True)
+    nome = serializers.CharField(source='user.profile.nome', read_only=True, default=None)
+    arroba = serializers.CharField(source='user.profile.arroba', read_only=True, default=None)
+
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('rank', 'position', 'score', 'user_id', 'nome', 'arroba')
@@ -2,40 +2,63 @@
 
 from rest_framework import viewsets, permissions, generics, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from .serializers import UserSerializer, UserRegisterSerializer, ProfileSerializer
-from user.models import CustomUser, Profile
+from .serializers import UserSerializer, UserRegisterSerializer, ProfileSerializer, LeaderboardEntrySerializer
+from user.models import CustomUser, LeaderboardEntry, Profile, XPEntry
 from user.permissions import IsAdminOrSelf
-from django.db.models import Q
+from user import autocomplete
+from user.search import search_users
+from user.xp import award_xp
+from django.db import transaction
+from django.db.models import F
 
 class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = UserRegisterSerializer
     permission_classes = [permissions.AllowAny]
 
+class UserSearchPagination(PageNumberPagination):
+    """Paginação dos resultados da busca (`?search=`) de usuários."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     # filter_backends = [filters.SearchFilter]
     # search_fields = ['username']
 
     def get_queryset(self):
-        queryset = CustomUser.objects.all().order_by('-date_joined')
+        queryset = CustomUser.objects.select_related('profile').order_by('-date_joined')
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(username__icontains=search) |
-                Q(profile__arroba__icontains=search) |
-                Q(profile__nome__icontains=search)
-            ).distinct()
+            # Coluna normalizada com índice de trigramas, ordenada por similaridade
+            queryset = search_users(queryset, search)
         return queryset
 
     def list(self, request, *args, **kwargs):
-        print(f"DEBUG: Search Query: {request.query_params.get('search')}")
-        queryset = self.filter_queryset(self.get_queryset())
-        print(f"DEBUG: Queryset Count: {queryset.count()}")
-        print(f"DEBUG: SQL: {queryset.query}")
-        print(f"DEBUG: Results: {list(queryset.values('id', 'username'))}")
-        return super().list(request, *args, **kwargs)
+        # Com ?search= a resposta é paginada ({count, next, previous, results})
+        if not request.query_params.get('search'):
+            return super().list(request, *args, **kwargs)
+        paginator = UserSearchPagination()
+        page = paginator.paginate_queryset(self.filter_queryset(self.get_queryset()), request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Sugestões para menções/seleção de amigos, sem query ao banco.
+        GET /api/v1/users/users/autocomplete/?q=jo&limit=8
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', autocomplete.DEFAULT_LIMIT)), autocomplete.MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'Deve ser um número inteiro.'})
+        return Response(autocomplete.index.search(request.query_params.get('q', ''), max(limit, 1)))
 
 # ViewSet para o modelo Profile com ações personalizadas
 class ProfileViewSet(viewsets.ModelViewSet):
@@ -76,25 +99,33 @@ class ProfileViewSet(viewsets.ModelViewSet):
     def completar_exercicio(self, request, pk=None):
         """Atualiza os campos ao completar um exercício."""
         profile = self.get_object()
-        profile.exercicios_concluidos += 1
-        profile.xp += request.data.get('xp_ganho', 0)
-        profile.save()
+        try:
+            xp_ganho = int(request.data.get('xp_ganho', 0))
+        except (TypeError, ValueError):
+            return Response({"detail": "xp_ganho deve ser um número inteiro."}, status=400)
+        if xp_ganho < 0:
+            return Response({"detail": "xp_ganho não pode ser negativo."}, status=400)
+
+        with transaction.atomic():
+            Profile.objects.filter(pk=profile.pk).update(exercicios_concluidos=F('exercicios_concluidos') + 1)
+            award_xp(profile.user, [(XPEntry.Source.EXERCISE, xp_ganho, None)])
+        profile.refresh_from_db(fields=['xp', 'exercicios_concluidos'])
         return Response({"detail": "Exercício concluído com sucesso!", "xp": profile.xp, "exercicios_concluidos": profile.exercicios_concluidos})
 # Ação personalizada para completar uma trilha
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def completar_trilha(self, request, pk=None):
         """Atualiza os campos ao completar uma trilha."""
         profile = self.get_object()
-        profile.trilhas_concluidas += 1
-        profile.save()
+        Profile.objects.filter(pk=profile.pk).update(trilhas_concluidas=F('trilhas_concluidas') + 1)
+        profile.refresh_from_db(fields=['trilhas_concluidas'])
         return Response({"detail": "Trilha concluída com sucesso!", "trilhas_concluidas": profile.trilhas_concluidas})
 # Ação personalizada para registrar um dia conectado
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def registrar_dia_conectado(self, request, pk=None):
         """Incrementa o número de dias conectados."""
         profile = self.get_object()
-        profile.dias_conectados += 1
-        profile.save()
+        Profile.objects.filter(pk=profile.pk).update(dias_conectados=F('dias_conectados') + 1)
+        profile.refresh_from_db(fields=['dias_conectados'])
         return Response({"detail": "Dia conectado registrado com sucesso!", "dias_conectados": profile.dias_conectados})
 
     @action(detail=False, methods=['get', 'put', 'patch'], permission_classes=[permissions.IsAuthenticated])
@@ -118,4 +149,77 @@ class ProfileViewSet(viewsets.ModelViewSet):
                         request.user.save()
                 
                 return Response(serializer.data)
-            return Response(serializer.errors, status=400)
\ No newline at end of file
+            return Response(serializer.errors, status=400)
+
+
+# ViewSet de rankings: lê apenas as fotos geradas por `manage.py build_leaderboards`
+class LeaderboardViewSet(viewsets.ViewSet):
+    """
+    GET /api/v1/users/leaderboard/?board=all_time|weekly&page=1&page_size=50
+    GET /api/v1/users/leaderboard/friends/?board=...   (apenas amigos + você)
+    GET /api/v1/users/leaderboard/me/?board=...        (sua posição)
+    """
+    permission_classes = [permissions.AllowAny]
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 100
+
+    def _board(self, request):
+        board = request.query_params.get('board', LeaderboardEntry.Board.ALL_TIME)
+        if board not in LeaderboardEntry.Board.values:
+            raise ValidationError({'board': f"Use um de: {', '.join(LeaderboardEntry.Board.values)}."})
+        return board
+
+    def _positive_int(self, request, name, default, maximum=None):
+        try:
+            value = int(request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            raise ValidationError({name: 'Deve ser um número inteiro.'})
+        if value < 1:
+            raise ValidationError({name: 'Deve ser maior que zero.'})
+        return min(value, maximum) if maximum else value
+
+    def _entries(self, board):
+        return LeaderboardEntry.objects.filter(board=board).select_related('user__profile')
+
+    def list(self, request):
+        board = self._board(request)
+        page = self._positive_int(request, 'page', 1)
+        page_size = self._positive_int(request, 'page_size', self.DEFAULT_PAGE_SIZE, self.MAX_PAGE_SIZE)
+
+        # Página = faixa de `position` (índice único), sem OFFSET
+        first = (page - 1) * page_size + 1
+        entries = self._entries(board).filter(position__gte=first, position__lt=first + page_size)
+        return Response({
+            'board': board,
+            'page': page,
+            'page_size': page_size,
+            'results': LeaderboardEntrySerializer(entries, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def me(self, request):
+        board = self._board(request)
+        entry = self._entries(board).filter(user=request.user).first()
+        if entry is None:
+            return Response({'board': board, 'entry': None})
+        return Response({
+            'board': board,
+            'entry': LeaderboardEntrySerializer(entry).data,
+            'computed_at': entry.computed_at,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def friends(self, request):
+        from friends.models import Friendship
+
+        board = self._board(request)
+        user = request.user
+        friendships = Friendship.objects.involving(user).values_list('user1_id', 'user2_id')
+        user_ids = {user.id} | {uid for pair in friendships for uid in pair}
+
+        entries = self._entries(board).filter(user_id__in=user_ids).order_by('position')
+        data = LeaderboardEntrySerializer(entries, many=True).data
+        # Posição dentro do grupo de amigos (o rank global continua em `rank`)
+        for index, row in enumerate(data, start=1):
+            row['friends_position'] = index
+        return Response({'board': board, 'results': data})
@@ -0,0 +1,205 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import connection
+
+from user.search import normalize
+
+"""Autocomplete de @arroba/nome a partir de um índice de prefixos em memória.
+
+Cada processo mantém uma lista ordenada de chaves (arroba, nome completo e
+cada palavra do nome, normalizados) e busca o intervalo do prefixo com
+`bisect`; os candidatos são ordenados por XP. Nenhuma query por tecla.
+
+Convergência entre processos: todo save/delete de perfil incrementa um
+contador no cache compartilhado e grava, na chave da nova versão, o id do
+usuário alterado. O processo que fez a alteração aplica o delta no próprio
+índice; os outros veem a versão diferente na próxima busca, leem os ids das
+versões que perderam e recarregam só esses perfis (uma query pequena). O
+índice inteiro só é recarregado na primeira busca do processo ou quando o
+log não cobre o intervalo (mais de `MAX_DELTAS` versões, chaves expiradas).
+Tudo isso acontece sob o lock: requests simultâneos esperam a mesma carga em
+vez de repetir cada um a sua.
+
+O XP muda via UPDATE (sem signals), por isso o índice também é recarregado a
+cada `MAX_AGE` segundos, em uma thread de fundo; as buscas continuam sendo
+respondidas pelo índice anterior enquanto isso.
+
+Com o `CACHES` padrão (locmem) cada processo tem o seu contador: os outros
+workers só veem as alterações na recarga de `MAX_AGE`. Em produção com mais
+de um worker configure um cache compartilhado (`CACHE_URL`, ex.: Redis).
+"""
+
+VERSION_KEY = 'user:autocomplete:version'
+CHANGE_KEY = 'user:autocomplete:change:{}'
+CHANGE_TIMEOUT = 60 * 60
+MAX_DELTAS = 500
+MAX_AGE = 300
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Marca que ordena depois de qualquer caractere: (prefixo, ...) < (prefixo + END, ...)
+END = '\U0010ffff'
+
+
+def _keys(arroba, nome):
+    nome = normalize(nome)
+    return {key for key in (normalize(arroba), nome, *nome.split()) if key}
+
+
+def _profiles(user_ids=None):
+    from user.models import Profile
+
+    profiles = Profile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    return profiles.values_list('user_id', 'arroba', 'nome', 'xp').iterator(chunk_size=2000)
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []      # [(chave, user_id)] ordenado
+        self._entries = {}   # user_id -> (xp, arroba, nome, chaves)
+        self._version = None
+        self._built_at = 0.0
+        self._refreshing = False
+
+    def reset(self):
+        """Descarta o índice; a próxima busca reconstrói do banco."""
+        with self._lock:
+            self._version = None
+
+    def _load(self):
+        """Lê todos os perfis: (versão lida antes da query, entradas, chaves ordenadas)."""
+        version = cache.get(VERSION_KEY, 0)
+        entries, keys = {}, []
+        for user_id, arroba, nome, xp in _profiles():
+            profile_keys = _keys(arroba, nome)
+            entries[user_id] = (xp, arroba, nome, profile_keys)
+            keys.extend((key, user_id) for key in profile_keys)
+        keys.sort()
+        return version, entries, keys
+
+    def rebuild(self):
+        """
+        Recarrega o índice inteiro. A troca é atômica; alterações feitas
+        durante a carga têm versão maior e são reaplicadas pelo log.
+        """
+        version, entries, keys = self._load()
+        with self._lock:
+            self._entries, self._keys = entries, keys
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._version is None:
+            with self._lock:
+                # Outro thread pode ter terminado a carga enquanto este esperava
+                if self._version is None:
+                    self.rebuild()
+            return
+        version = cache.get(VERSION_KEY, 0)
+        if version != self._version:
+            with self._lock:
+                if self._version is not None and version != self._version:
+                    self._catch_up(version)
+        if time.monotonic() - self._built_at > MAX_AGE:
+            self._refresh_in_background()
+
+    def _catch_up(self, version):
+        """Aplica as alterações de `self._version + 1` até `version` (chamado com o lock)."""
+        start = self._version
+        if not start < version <= start + MAX_DELTAS:
+            self.rebuild()
+            return
+        names = [CHANGE_KEY.format(number) for number in range(start + 1, version + 1)]
+        changes = cache.get_many(names)
+        if len(changes) != len(names):
+            self.rebuild()
+            return
+        user_ids = set(changes.values())
+        current = {user_id: (arroba, nome, xp) for user_id, arroba, nome, xp in _profiles(user_ids)}
+        for user_id in user_ids:
+            self._discard(user_id)
+            if user_id in current:
+                self._insert(user_id, *current[user_id])
+        self._version = version
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_rebuild, name='autocomplete-rebuild', daemon=True).start()
+
+    def _background_rebuild(self):
+        try:
+            self.rebuild()
+        finally:
+            self._refreshing = False
+            # A thread abriu a própria conexão com o banco
+            connection.close()
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Top-`limit` perfis cujo arroba/nome começa com o texto, por XP (desc)."""
+        prefix = normalize(text).lstrip('@')
+        if not prefix:
+            return []
+        self._ensure_fresh()
+        with self._lock:
+            start = bisect_left(self._keys, (prefix,))
+            end = bisect_left(self._keys, (prefix + END,), start)
+            candidates = {user_id for _, user_id in self._keys[start:end]}
+            top = heapq.nlargest(limit, candidates, key=lambda user_id: (self._entries[user_id][0], -user_id))
+            return [
+                {'id': user_id, 'arroba': self._entries[user_id][1], 'nome': self._entries[user_id][2], 'xp': self._entries[user_id][0]}
+                for user_id in top
+            ]
+
+    def upsert(self, user_id, arroba, nome, xp):
+        with self._lock:
+            self._discard(user_id)
+            self._insert(user_id, arroba, nome, xp)
+            self._bump(user_id)
+
+    def remove(self, user_id):
+        with self._lock:
+            self._discard(user_id)
+            self._bump(user_id)
+
+    def _insert(self, user_id, arroba, nome, xp):
+        profile_keys = _keys(arroba, nome)
+        self._entries[user_id] = (xp, arroba, nome, profile_keys)
+        for key in profile_keys:
+            insort(self._keys, (key, user_id))
+
+    def _discard(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        for key in entry[3]:
+            position = bisect_left(self._keys, (key, user_id))
+            if position < len(self._keys) and self._keys[position] == (key, user_id):
+                del self._keys[position]
+
+    def _bump(self, user_id):
+        """
+        Publica a alteração para os outros processos (versão nova + id do
+        usuário). Se ninguém mais alterou desde a nossa versão, o índice local
+        (já com o delta) continua válido; senão o log completa o que falta.
+        """
+        cache.add(VERSION_KEY, 0, timeout=None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            self._version = None
+            return
+        cache.set(CHANGE_KEY.format(version), user_id, timeout=CHANGE_TIMEOUT)
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+
+
+index = PrefixIndex()
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum, Window
+from django.db.models.functions import Rank, RowNumber
+from django.utils import timezone
+
+from user.models import LeaderboardEntry, Profile
+
+"""Cálculo dos rankings (geral e semanal).
+
+As posições são calculadas no banco com funções de janela (RANK/ROW_NUMBER)
+e gravadas em LeaderboardEntry. A API só lê essas fotos; recalcule-as
+periodicamente com `manage.py build_leaderboards` (ex.: cron a cada 10 min).
+"""
+
+BATCH_SIZE = 2000
+
+
+def week_start(now=None):
+    """Segunda-feira 00:00 da semana corrente (no fuso do projeto)."""
+    now = timezone.localtime(now)
+    return (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _all_time_rows():
+    return (
+        Profile.objects.filter(xp__gt=0)
+        .annotate(
+            rank=Window(Rank(), order_by=F('xp').desc()),
+            position=Window(RowNumber(), order_by=[F('xp').desc(), F('id').asc()]),
+        )
+        .values_list('user_id', 'xp', 'rank', 'position')
+    )
+
+
+def _weekly_rows(start):
+    from trilhas.models import ProgressoAtividade
+
+    return (
+        ProgressoAtividade.objects.filter(
+            status=ProgressoAtividade.Status.COMPLETED,
+            completed_at__gte=start,
+        )
+        .values('user_id')
+        .annotate(score=Sum('activity__xp_reward'))
+        .annotate(
+            rank=Window(Rank(), order_by=F('score').desc()),
+            position=Window(RowNumber(), order_by=[F('score').desc(), F('user_id').asc()]),
+        )
+        .order_by()
+        .values_list('user_id', 'score', 'rank', 'position')
+    )
+
+
+def build_board(board, now=None):
+    """Recalcula um ranking inteiro e substitui a foto anterior. Retorna o número de linhas."""
+    now = now or timezone.now()
+    if board == LeaderboardEntry.Board.WEEKLY:
+        period_start = week_start(now)
+        rows = _weekly_rows(period_start)
+    else:
+        period_start = None
+        rows = _all_time_rows()
+
+    total = 0
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(board=board).delete()
+        batch = []
+        for user_id, score, rank, position in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(LeaderboardEntry(
+                board=board, user_id=user_id, score=score, rank=rank, position=position,
+                period_start=period_start, computed_at=now,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                LeaderboardEntry.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        LeaderboardEntry.objects.bulk_create(batch)
+        total += len(batch)
+    return total
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.leaderboard import build_board
+from user.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = "Recalcula as fotos dos rankings (geral e semanal). Rode periodicamente (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--board', choices=LeaderboardEntry.Board.values, action='append',
+            help='Ranking a recalcular (pode repetir). Padrão: todos.',
+        )
+
+    def handle(self, *args, board, **options):
+        for name in board or LeaderboardEntry.Board.values:
+            started = time.monotonic()
+            total = build_board(name)
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f'{name}: {total} posição(ões) em {elapsed:.2f}s.'))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from user.models import Profile, XPEntry
+
+
+class Command(BaseCommand):
+    help = "Recalcula Profile.xp a partir do livro-razão de XP (XPEntry)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Apenas mostra quantos perfis estão divergentes, sem alterar nada.',
+        )
+
+    def handle(self, *args, dry_run, **options):
+        started = time.monotonic()
+        ledger_total = Coalesce(
+            Subquery(
+                XPEntry.objects.filter(user=OuterRef('user'))
+                .order_by()
+                .values('user')
+                .annotate(total=Sum('amount'))
+                .values('total'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+        with transaction.atomic():
+            divergent = Profile.objects.filter(~Q(xp=ledger_total))
+            count = divergent.count()
+            if not dry_run and count:
+                # Um único UPDATE com subquery correlacionada para todos os perfis divergentes
+                Profile.objects.filter(pk__in=divergent.values('pk')).update(xp=ledger_total)
+
+        elapsed = time.monotonic() - started
+        action = 'divergente(s) encontrado(s)' if dry_run else 'corrigido(s)'
+        self.stdout.write(self.style.SUCCESS(f'{count} perfil(is) {action} em {elapsed:.2f}s.'))
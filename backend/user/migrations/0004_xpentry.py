@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_alter_customuser_managers_alter_customuser_email_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='XPEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('activity', 'Atividade concluída'), ('exercise', 'Exercício concluído'), ('adjustment', 'Ajuste / saldo inicial')], max_length=20)),
+                ('amount', models.IntegerField()),
+                ('reference_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='xp_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='user_xpentry_user_created_idx'), models.Index(fields=['created_at'], name='user_xpentry_created_idx')],
+            },
+        ),
+    ]
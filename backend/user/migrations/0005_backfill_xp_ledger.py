@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:01
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def seed_ledger(apps, schema_editor):
+    """Registra o XP atual de cada perfil como saldo inicial, para o rollup preservar os totais."""
+    Profile = apps.get_model('user', 'Profile')
+    XPEntry = apps.get_model('user', 'XPEntry')
+    batch = []
+    for user_id, xp in Profile.objects.exclude(xp=0).values_list('user_id', 'xp').iterator(chunk_size=BATCH_SIZE):
+        batch.append(XPEntry(user_id=user_id, source='adjustment', amount=xp))
+        if len(batch) >= BATCH_SIZE:
+            XPEntry.objects.bulk_create(batch)
+            batch = []
+    XPEntry.objects.bulk_create(batch)
+
+
+def clear_ledger(apps, schema_editor):
+    apps.get_model('user', 'XPEntry').objects.filter(source='adjustment').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_xpentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_ledger, clear_ledger),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_backfill_xp_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('all_time', 'Geral'), ('weekly', 'Semanal')], max_length=20)),
+                ('rank', models.PositiveIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('score', models.IntegerField()),
+                ('period_start', models.DateTimeField(blank=True, help_text='Início do período (rankings semanais)', null=True)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['board', 'position'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-xp', 'id'], name='user_profile_xp_rank_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'user'), name='user_leaderboard_board_user_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'position'), name='user_leaderboard_board_position_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=800),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:51
+
+from django.db import migrations
+
+from user.search import normalize
+
+BATCH_SIZE = 1000
+
+
+def fill_search_text(apps, schema_editor):
+    Profile = apps.get_model('user', 'Profile')
+    batch = []
+    profiles = Profile.objects.select_related('user').only('id', 'nome', 'arroba', 'user__username')
+    for profile in profiles.iterator(chunk_size=BATCH_SIZE):
+        profile.search_text = normalize(' '.join(filter(None, (profile.nome, profile.arroba, profile.user.username))))
+        batch.append(profile)
+        if len(batch) >= BATCH_SIZE:
+            Profile.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Profile.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0007_profile_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:52
+
+from django.db import migrations
+
+
+def create_trigram_index(apps, schema_editor):
+    """Índice GIN de trigramas (pg_trgm) para a busca; os outros bancos usam a coluna sem índice."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS user_profile_search_trgm '
+        'ON user_profile USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS user_profile_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_backfill_profile_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, UserManager
 from django.conf import settings
+from django.utils import timezone
 
 # --- NOVO ---
 # 1. Crie um Manager customizado
@@ -91,6 +92,88 @@ class Profile(models.Model):
     exercicios_concluidos = models.IntegerField(default=0, editable=False)
     trilhas_concluidas = models.IntegerField(default=0, editable=False)
     dias_conectados = models.IntegerField(default=0, editable=False)
+    # nome + arroba + username normalizados para a busca (user/search.py)
+    search_text = models.CharField(max_length=800, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Ranking geral: ordenação por XP (desempate pelo id)
+            models.Index(fields=['-xp', 'id'], name='user_profile_xp_rank_idx'),
+        ]
+
+    # Contadores mantidos só com F() (award_xp, completar_*, progress.py)
+    COUNTER_FIELDS = ('xp', 'exercicios_concluidos', 'trilhas_concluidas', 'dias_conectados')
+
+    def __str__(self):
+        return self.nome
+
+    def save(self, *args, **kwargs):
+        """
+        Edições do perfil não regravam os contadores: um save() completo
+        escreveria o XP lido no início do request por cima de um
+        `F('xp') + n` concorrente. Os valores são relidos para a resposta.
+        """
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            self.refresh_from_db(fields=self.COUNTER_FIELDS)
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+# Livro-razão de XP: cada ganho é uma linha nova (append-only).
+# Profile.xp é apenas o total acumulado, mantido com F() e reconstruível
+# a partir daqui com `manage.py rollup_xp`.
+class XPEntry(models.Model):
+    class Source(models.TextChoices):
+        ACTIVITY = 'activity', 'Atividade concluída'
+        EXERCISE = 'exercise', 'Exercício concluído'
+        ADJUSTMENT = 'adjustment', 'Ajuste / saldo inicial'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='xp_entries', on_delete=models.CASCADE)
+    source = models.CharField(max_length=20, choices=Source.choices)
+    amount = models.IntegerField()
+    # Id do objeto de origem (ex.: a atividade), quando houver
+    reference_id = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # XP por usuário em uma janela de tempo
+            models.Index(fields=['user', 'created_at'], name='user_xpentry_user_created_idx'),
+            # Rankings por período (soma de todos os usuários em uma janela)
+            models.Index(fields=['created_at'], name='user_xpentry_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.amount:+d} XP ({self.source})"
+
+
+# Foto (snapshot) periódica dos rankings, gerada por `manage.py build_leaderboards`.
+# "Meu ranking" é um lookup por (board, user) e as páginas do top-N são
+# faixas de `position`, ambos servidos por índice em tempo constante.
+class LeaderboardEntry(models.Model):
+    class Board(models.TextChoices):
+        ALL_TIME = 'all_time', 'Geral'
+        WEEKLY = 'weekly', 'Semanal'
+
+    board = models.CharField(max_length=20, choices=Board.choices)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='leaderboard_entries', on_delete=models.CASCADE)
+    # rank: posição com empates (1, 1, 3...); position: sequencial, usada na paginação
+    rank = models.PositiveIntegerField()
+    position = models.PositiveIntegerField()
+    score = models.IntegerField()
+    period_start = models.DateTimeField(null=True, blank=True, help_text="Início do período (rankings semanais)")
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['board', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'user'], name='user_leaderboard_board_user_uniq'),
+            models.UniqueConstraint(fields=['board', 'position'], name='user_leaderboard_board_position_uniq'),
+        ]
 
     def __str__(self):
-        return self.nome
\ No newline at end of file
+        return f"{self.get_board_display()} #{self.rank} {self.user} ({self.score})"
\ No newline at end of file
@@ -0,0 +1,55 @@
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+
+"""Busca de usuários por nome, @arroba ou username.
+
+`Profile.search_text` guarda esses campos normalizados (sem acentos, em
+minúsculas), atualizado ao salvar o perfil ou o username. No PostgreSQL a
+coluna tem um índice GIN `gin_trgm_ops` (pg_trgm), que atende tanto o
+`LIKE '%termo%'` quanto a similaridade por trigramas usada no ranking; nos
+outros bancos a busca é um `contains` simples na mesma coluna, sem join.
+"""
+
+def normalize(text):
+    """'  José  da Silva ' -> 'jose da silva' (acentos removidos, casefold, espaços únicos)."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def build_search_text(profile, username=None):
+    if username is None:
+        username = profile.user.username if profile.user_id else ''
+    return normalize(' '.join(filter(None, (profile.nome, profile.arroba, username))))
+
+
+def search_users(queryset, text):
+    """
+    Filtra usuários (CustomUser) pelo texto e anota `rank` (maior = mais
+    relevante), já ordenado por relevância.
+    """
+    term = normalize(text).lstrip('@')
+    if not term:
+        return queryset.none()
+
+    if connection.vendor == 'postgresql':
+        return (
+            queryset.filter(
+                Q(profile__search_text__contains=term)
+                | Q(profile__search_text__trigram_word_similar=term)
+            )
+            .annotate(rank=TrigramWordSimilarity(term, 'profile__search_text'))
+            .order_by('-rank', 'id')
+        )
+
+    # Sem pg_trgm: prefixo do texto > início de palavra > qualquer posição
+    rank = Case(
+        When(profile__search_text__startswith=term, then=Value(2.0)),
+        When(profile__search_text__contains=f' {term}', then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return queryset.filter(profile__search_text__contains=term).annotate(rank=rank).order_by('-rank', 'id')
@@ -39,8 +39,11 @@ def redirect_with_tokens(sender, request, user, **kwargs):
         # Define o redirect URL na sessão para ser usado pelo adapter
         request.session['social_redirect_url'] = redirect_url
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from .autocomplete import index as autocomplete_index
 from .models import CustomUser, Profile
+from .search import build_search_text
 
 @receiver(post_save, sender=CustomUser)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -55,3 +58,37 @@ def create_user_profile(sender, instance, created, **kwargs):
             skills="Python, Django"
         )
 
+
+
+@receiver(pre_save, sender=Profile)
+def update_profile_search_text(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Mantém `search_text` (nome + arroba + username normalizados) em dia."""
+    if raw or (update_fields is not None and not {'nome', 'arroba'} & set(update_fields)):
+        return
+    instance.search_text = build_search_text(instance)
+    if update_fields is not None and 'search_text' not in update_fields and instance.pk:
+        # Save parcial (update_fields) não grava search_text: atualiza à parte
+        Profile.objects.filter(pk=instance.pk).update(search_text=instance.search_text)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_search_text_on_username_change(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    profile = Profile.objects.filter(user=instance).only('id', 'nome', 'arroba').first()
+    if profile is not None:
+        Profile.objects.filter(pk=profile.pk).update(search_text=build_search_text(profile, instance.username))
+
+
+@receiver(post_save, sender=Profile)
+def update_autocomplete_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    user_id, arroba, nome, xp = instance.user_id, instance.arroba, instance.nome, instance.xp
+    transaction.on_commit(lambda: autocomplete_index.upsert(user_id, arroba, nome, xp))
+
+
+@receiver(post_delete, sender=Profile)
+def update_autocomplete_on_delete(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: autocomplete_index.remove(user_id))
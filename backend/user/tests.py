@@ -1,3 +1,278 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from events.models import EventParticipant
+from events.tests import create_event
+from friends.models import FriendRequest, Friendship
+from trilhas import progress
+from trilhas.models import ProgressoAtividade
+from trilhas.tests import activity_ids, create_trilha
+from user import autocomplete
+from user.api.v1.serializers import ProfileSerializer
+from user.leaderboard import build_board, week_start
+from user.models import CustomUser, LeaderboardEntry, Profile, XPEntry
+from user.search import normalize
+from user.xp import award_xp
+
+
+def create_user(username, nome=None, arroba=None):
+    user = CustomUser.objects.create_user(email=f'{username}@example.com', username=username)
+    profile = user.profile
+    profile.nome = nome or username
+    profile.arroba = arroba or username
+    profile.save()
+    return user
+
+
+class UserSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def search(self, text):
+        response = self.client.get('/api/v1/users/users/', {'search': text})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_normalize_folds_accents_and_case(self):
+        self.assertEqual(normalize('  JOSÉ  da Conceição '), 'jose da conceicao')
+
+    def test_search_ignores_accents_and_at_sign(self):
+        user = create_user('ana', nome='Ângela Muñoz', arroba='angela')
+        create_user('bruno')
+        self.assertEqual(self.search('angela munoz'), [user.id])
+        self.assertEqual(self.search('@ANGELA'), [user.id])
+
+    def test_prefix_matches_rank_first(self):
+        inside = create_user('mariana', nome='Mariana')
+        prefix = create_user('ana', nome='Ana Souza')
+        self.assertEqual(self.search('ana'), [prefix.id, inside.id])
+
+    def test_search_text_follows_username_change(self):
+        user = create_user('antigo')
+        user.username = 'renomeado'
+        user.save()
+        self.assertIn('renomeado', Profile.objects.get(user=user).search_text)
+        self.assertEqual(self.search('renomeado'), [user.id])
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        autocomplete.index.reset()
+        self.client = APIClient()
+
+    def suggest(self, text, **params):
+        response = self.client.get('/api/v1/users/users/autocomplete/', {'q': text, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()]
+
+    def test_prefix_matches_ranked_by_xp(self):
+        low = create_user('joao', nome='João Silva')
+        high = create_user('joana', nome='Joana Souza')
+        create_user('maria')
+        Profile.objects.filter(user=high).update(xp=50)
+        autocomplete.index.reset()
+        self.assertEqual(self.suggest('jo'), [high.id, low.id])
+        self.assertEqual(self.suggest('souza'), [high.id])
+        self.assertEqual(self.suggest('jo', limit=1), [high.id])
+
+    def test_index_follows_profile_save_and_delete(self):
+        user = create_user('carla')
+        self.assertEqual(self.suggest('carl'), [user.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = user.profile
+            profile.arroba = 'cacau'
+            profile.save()
+        self.assertEqual(self.suggest('cac'), [user.id])
+        self.assertEqual(self.suggest('carla'), [user.id])  # nome continua "carla"
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(self.suggest('cac'), [])
+
+    def test_version_change_from_another_process_triggers_rebuild(self):
+        self.assertEqual(self.suggest('davi'), [])
+        user = create_user('davi')  # sem on_commit: simula a alteração vinda de outro processo
+        cache.set(autocomplete.VERSION_KEY, cache.get(autocomplete.VERSION_KEY, 0) + 1, None)
+        self.assertEqual(self.suggest('davi'), [user.id])
+
+    def test_changes_from_another_process_are_applied_as_deltas(self):
+        other = create_user('elisa')
+        self.assertEqual(self.suggest('eli'), [other.id])
+        user = create_user('eliana')
+        cache.add(autocomplete.VERSION_KEY, 0, None)
+        version = cache.incr(autocomplete.VERSION_KEY)
+        cache.set(autocomplete.CHANGE_KEY.format(version), user.id)
+
+        with mock.patch.object(autocomplete.index, '_load', side_effect=AssertionError('recarga completa')):
+            self.assertEqual(self.suggest('elian'), [user.id])
+
+    def test_concurrent_first_searches_load_once(self):
+        loads = []
+
+        def slow_load():
+            loads.append(1)
+            time.sleep(0.05)
+            return cache.get(autocomplete.VERSION_KEY, 0), {}, []
+
+        with mock.patch.object(autocomplete.index, '_load', slow_load):
+            threads = [threading.Thread(target=autocomplete.index.search, args=('ana',)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(loads), 1)
+
+
+class UserSummaryQueryCountTests(TestCase):
+    """O número de queries das listagens com usuários não cresce com o tamanho da lista."""
+
+    def setUp(self):
+        self.me = create_user('eu')
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+        self.event = create_event(self.me)
+        self.created = 0
+
+    def add_people(self, count):
+        for _ in range(count):
+            self.created += 1
+            other = create_user(f'pessoa{self.created}')
+            Friendship.objects.create(user1=other, user2=self.me)
+            FriendRequest.objects.create(from_user=other, to_user=self.me)
+            EventParticipant.objects.create(event=self.event, user=other)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.add_people(2)
+        small = self.count_queries(url)
+        self.add_people(6)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_users_list(self):
+        self.assert_constant_queries('/api/v1/users/users/')
+
+    def test_friends_list(self):
+        self.assert_constant_queries('/api/v1/friends/')
+
+    def test_friend_requests_list(self):
+        self.assert_constant_queries('/api/v1/friends/request/')
+
+    def test_event_participants(self):
+        self.assert_constant_queries(f'/api/v1/events/events/{self.event.pk}/participants/')
+
+    def test_event_detail(self):
+        self.assert_constant_queries(f'/api/v1/events/events/{self.event.pk}/')
+
+
+class XPLedgerTests(TestCase):
+    def test_award_writes_ledger_and_profile_total(self):
+        user = create_user('ana')
+        total = award_xp(user, [
+            (XPEntry.Source.ACTIVITY, 30, 7),
+            (XPEntry.Source.EXERCISE, 0, 8),
+            (XPEntry.Source.ADJUSTMENT, 12, None),
+        ])
+
+        self.assertEqual(total, 42)
+        self.assertEqual(Profile.objects.get(user=user).xp, 42)
+        self.assertEqual(
+            sorted(XPEntry.objects.filter(user=user).values_list('source', 'amount', 'reference_id')),
+            [('activity', 30, 7), ('adjustment', 12, None)],
+        )
+        self.assertEqual(award_xp(user, []), 0)
+
+    def test_profile_edit_keeps_concurrent_award(self):
+        user = create_user('ana')
+        award_xp(user, [(XPEntry.Source.ADJUSTMENT, 10, None)])
+        client = APIClient()
+        client.force_authenticate(user)
+        update = ProfileSerializer.update
+
+        def update_after_award(serializer, instance, validated_data):
+            # XP concedido entre a leitura do perfil e o save da edição
+            award_xp(user, [(XPEntry.Source.EXERCISE, 100, None)])
+            return update(serializer, instance, validated_data)
+
+        with mock.patch.object(ProfileSerializer, 'update', update_after_award):
+            response = client.patch('/api/v1/users/profile/me/', {'bio': 'Back-end'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['xp'], 110)
+        profile = Profile.objects.get(user=user)
+        self.assertEqual((profile.xp, profile.bio), (110, 'Back-end'))
+
+        award_xp(user, [(XPEntry.Source.EXERCISE, 5, None)])
+        profile.bio = 'Full-stack'
+        profile.save()
+        self.assertEqual(Profile.objects.get(user=user).xp, 115)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.users = [create_user(name) for name in ('ana', 'bia', 'caio', 'duda')]
+        for user, xp in zip(self.users, (50, 80, 50, 0)):
+            Profile.objects.filter(user=user).update(xp=xp)
+        self.client = APIClient()
+
+    def test_board_ranks_ties_and_numbers_positions(self):
+        self.assertEqual(build_board(LeaderboardEntry.Board.ALL_TIME), 3)
+        rows = LeaderboardEntry.objects.filter(board=LeaderboardEntry.Board.ALL_TIME)
+        self.assertEqual(
+            [(row.user_id, row.score, row.rank, row.position) for row in rows],
+            [(self.users[1].id, 80, 1, 1), (self.users[0].id, 50, 2, 2), (self.users[2].id, 50, 2, 3)],
+        )
+
+        Profile.objects.filter(user=self.users[3]).update(xp=90)
+        build_board(LeaderboardEntry.Board.ALL_TIME)
+        self.assertEqual(list(rows.all().values_list('user_id', flat=True))[:1], [self.users[3].id])
+        self.assertEqual(rows.all().count(), 4)
+
+    def test_api_pages_by_position_and_reports_me(self):
+        build_board(LeaderboardEntry.Board.ALL_TIME)
+
+        page = self.client.get('/api/v1/users/leaderboard/', {'page': 2, 'page_size': 2}).data
+        self.assertEqual([row['user_id'] for row in page['results']], [self.users[2].id])
+        self.assertEqual(self.client.get('/api/v1/users/leaderboard/', {'board': 'mensal'}).status_code, 400)
+
+        self.client.force_authenticate(self.users[0])
+        me = self.client.get('/api/v1/users/leaderboard/me/').data
+        self.assertEqual((me['entry']['rank'], me['entry']['position']), (2, 2))
+        self.client.force_authenticate(self.users[3])
+        self.assertIsNone(self.client.get('/api/v1/users/leaderboard/me/').data['entry'])
+
+    def test_weekly_board_counts_only_this_week(self):
+        now = timezone.now()
+        first, second = activity_ids(create_trilha('python', activities=2))
+        progress.complete_activities(self.users[0], [first, second])
+        progress.complete_activities(self.users[1], [first, second])
+        progress.complete_activities(self.users[2], [first])
+        ProgressoAtividade.objects.filter(user=self.users[0]).update(completed_at=week_start(now) - timedelta(days=1))
+        ProgressoAtividade.objects.filter(user=self.users[1], activity_id=first).update(
+            completed_at=week_start(now) - timedelta(seconds=1),
+        )
+
+        self.assertEqual(build_board(LeaderboardEntry.Board.WEEKLY, now=now), 2)
+        rows = LeaderboardEntry.objects.filter(board=LeaderboardEntry.Board.WEEKLY)
+        self.assertEqual(
+            [(row.user_id, row.score, row.rank, row.position) for row in rows],
+            [(self.users[1].id, 10, 1, 1), (self.users[2].id, 10, 1, 2)],
+        )
+        self.assertEqual({row.period_start for row in rows}, {week_start(now)})
+        self.assertFalse(LeaderboardEntry.objects.filter(board=LeaderboardEntry.Board.ALL_TIME).exists())
 
-# Create your tests here.
+        response = self.client.get('/api/v1/users/leaderboard/', {'board': 'weekly'})
+        self.assertEqual([row['user_id'] for row in response.data['results']], [self.users[1].id, self.users[2].id])
@@ -0,0 +1,32 @@
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from user.models import Profile, XPEntry
+
+
+def award_xp(user, entries):
+    """
+    Registra ganhos de XP no livro-razão e soma o total ao perfil.
+    `entries` é um iterável de (source, amount, reference_id).
+    Usa um bulk INSERT e um UPDATE com F(), sem ler-modificar-gravar o perfil.
+    Retorna o total concedido.
+    """
+    rows = [
+        XPEntry(user=user, source=source, amount=amount, reference_id=reference_id)
+        for source, amount, reference_id in entries
+        if amount
+    ]
+    if not rows:
+        return 0
+    XPEntry.objects.bulk_create(rows)
+    total = sum(row.amount for row in rows)
+    Profile.objects.filter(user=user).update(xp=F('xp') + total)
+    return total
+
+
+def xp_gained(user, since, until=None):
+    """XP ganho pelo usuário em uma janela de tempo (usa o índice (user, created_at))."""
+    entries = XPEntry.objects.filter(user=user, created_at__gte=since)
+    if until is not None:
+        entries = entries.filter(created_at__lt=until)
+    return entries.aggregate(total=Coalesce(Sum('amount'), 0))['total']
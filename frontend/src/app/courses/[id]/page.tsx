@@ -24,7 +24,6 @@ interface Atividade {
   order: number;
   xp_reward: number;
   status: 'pending' | 'completed';
-  completed_at: string | null;
   type: 'video' | 'text' | 'quiz';
 }
 
@@ -88,7 +87,7 @@ export default function CourseDetailPage() {
         const newModules = prev.modules.map(mod => ({
           ...mod,
           activities: mod.activities.map(act =>
-            act.id === activityId ? { ...act, status: 'completed' as const, completed_at: new Date().toISOString() } : act
+            act.id === activityId ? { ...act, status: 'completed' as const } : act
           )
         }));
         return { ...prev, modules: newModules };
@@ -13,8 +13,8 @@ interface EventoAPI {
   start_datetime: string; // Vem como ISO string (ex: 2025-11-25T18:00:00Z)
   end_datetime: string;
   location: string;
-  thumbnail: string | null; // Base64
-  banner: string | null;    // Base64
+  thumbnail: string | null; // URL da imagem
+  banner: string | null;    // URL da imagem
   max_participants?: number;
 }
 
@@ -61,13 +61,15 @@ export function EventosSection() {
     }).format(date).toUpperCase().replace('.', '');
   };
 
-  // --- TRATAMENTO DE IMAGEM (Base64 ou Fallback) ---
-  const getImageSrc = (base64String: string | null, fallbackType: 'banner' | 'thumb') => {
-    if (base64String) {
-      // Se já vier com "data:image...", usa direto. Se não, adiciona o prefixo.
-      return base64String.startsWith('data:') 
-        ? base64String 
-        : `data:image/jpeg;base64,${base64String}`;
+  // --- TRATAMENTO DE IMAGEM (URL, Base64 ou Fallback) ---
+  const getImageSrc = (image: string | null, fallbackType: 'banner' | 'thumb') => {
+    if (image) {
+      // A API devolve a URL da imagem; base64 legado ainda é aceito.
+      // Não basta testar '/': base64 puro de JPEG começa com '/9j/'.
+      if (image.startsWith('http://') || image.startsWith('https://') || image.startsWith('/media/') || image.startsWith('data:')) {
+        return image;
+      }
+      return `data:image/jpeg;base64,${image}`;
     }
     // Imagens de fallback caso não tenha nada no banco
     if (fallbackType === 'banner') return "https://images.unsplash.com/photo-1540575467063-178a50c2df87?w=800&q=80";